@@ -1,18 +1,94 @@
+import asyncio
+import logging
+import signal
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 
 from app.config.database import SessionLocal
+from app.config.settings import reload_settings
+from app.routers.anonymous_questions import (
+    router as anonymous_questions_router,
+)
 from app.routers.auth.router import router as auth_router
 from app.routers.chat_history import router as chat_history_router
+from app.routers.chat_router import router as chat_router
+from app.routers.chat_statistics import router as chat_statistics_router
 from app.routers.document.router import router as document_router
 from app.routers.llm.router import router as llm_router
-from app.routers.chat_router import router as chat_router
 from app.routers.user.router import router as user_router
-from app.routers.anonymous_questions import router as anonymous_questions_router
-from app.routers.chat_statistics import router as chat_statistics_router
+from app.services.anonymous_questions.topic_catalog import (
+    get_topic_catalog_watcher,
+    get_topic_classifier,
+)
+from app.services.chat_history.turn_writer import (
+    get_chat_turn_writer,
+    stop_chat_turn_writer,
+)
+from app.services.llm.llm_service import LLMStrategyFactory
+from app.services.rag.rag_service import close_rag_service, get_rag_service
+from app.utils.executor import (
+    get_retrieval_executor,
+    shutdown_retrieval_executor,
+)
+from app.utils.google_token_verifier import get_google_token_verifier
+
+logger = logging.getLogger(__name__)
+
+
+def _install_settings_reload_handler() -> None:
+    """Reload the cached settings on SIGHUP, where the platform allows it."""
+    if not hasattr(signal, 'SIGHUP'):
+        return
+
+    def reload():
+        reload_settings()
+        logger.info('Settings reloaded on SIGHUP')
+
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload)
+    except (NotImplementedError, RuntimeError) as e:
+        logger.warning(f'Could not install SIGHUP handler: {e}')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _install_settings_reload_handler()
+    get_retrieval_executor()
+    get_chat_turn_writer()
+    await get_google_token_verifier().start()
+
+    try:
+        # Warm the embedding model and Chroma client before serving traffic
+        await run_in_threadpool(get_rag_service)
+    except Exception as e:
+        # Requests retry the initialization lazily through get_rag_service
+        logger.error(f'Failed to warm up RagService: {e}')
+
+    try:
+        # After the RAG warm-up: the embedding mode reuses its model
+        await run_in_threadpool(get_topic_classifier)
+    except Exception as e:
+        # Requests retry the initialization lazily through
+        # get_topic_classifier
+        logger.error(f'Failed to warm up the topic classifier: {e}')
+    get_topic_catalog_watcher().start()
+
+    yield
+
+    # Drain pending chat turns before the process exits
+    await run_in_threadpool(stop_chat_turn_writer)
+    await LLMStrategyFactory.close()
+    await get_topic_catalog_watcher().stop()
+    await get_google_token_verifier().stop()
+    shutdown_retrieval_executor()
+    close_rag_service()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,12 +20,12 @@ from sqlalchemy.orm import (
 from sqlalchemy.sql.functions import coalesce
 from starlette.requests import Request
 
-from app.config.settings import Settings
+from app.config.settings import get_settings
 from app.schemas.error import Error
 
 Base = declarative_base()
 
-engine = create_engine(Settings().DATABASE_URL)
+engine = create_engine(get_settings().DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
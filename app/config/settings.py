@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,7 +7,7 @@ class Settings(BaseSettings):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    model_config = SettingsConfigDict(env_file='.env')
+    model_config = SettingsConfigDict(env_file='.env', frozen=True)
 
     DATABASE_URL: str
     GOOGLE_CLIENT_ID: str
@@ -24,3 +26,73 @@ class Settings(BaseSettings):
     CHROMA_HOST: str
     CHROMA_COLLECTION: str = "chatbot_documents"
     GOOGLE_CREDENTIALS_B64: str = ""
+    RETRIEVAL_MAX_WORKERS: int = 4
+    RETRIEVAL_MAX_QUEUE: int = 32
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_SIZE: int = 2048
+    EMBEDDING_CACHE_TTL_SECONDS: int = 3600
+    INGEST_BATCH_SIZE: int = 64
+    RAG_TOP_K: int = 3
+    RAG_HYBRID_SEARCH_ENABLED: bool = True
+    RAG_CANDIDATE_POOL: int = 20
+    RAG_RRF_K: int = 60
+    LEXICAL_INDEX_SYNC_INTERVAL_SECONDS: int = 60
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1024
+    SEMANTIC_CACHE_TTL_SECONDS: int = 86400
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    CHAT_WRITER_BATCH_SIZE: int = 50
+    CHAT_WRITER_FLUSH_INTERVAL_SECONDS: float = 0.5
+    CHAT_WRITER_MAX_QUEUE: int = 10000
+    CHAT_WRITER_SHUTDOWN_TIMEOUT_SECONDS: float = 30.0
+    PROMPT_TOKEN_BUDGET: int = 6000
+    LLM_MAX_TOKENS: int = 3000
+    STREAM_DISCONNECT_POLL_SECONDS: float = 0.5
+    LLM_MAX_CONCURRENT_STREAMS: int = 32
+    LLM_MAX_STREAMS_PER_USER: int = 2
+    LLM_ADMISSION_QUEUE_SIZE: int = 64
+    LLM_ADMISSION_TIMEOUT_SECONDS: float = 10.0
+    LLM_COALESCING_ENABLED: bool = True
+    SIMULATED_LLM_TTFT_MS: int = 500
+    SIMULATED_LLM_TOKENS_PER_SECOND: float = 50.0
+    SIMULATED_LLM_ERROR_RATE: float = 0.0
+    SIMULATED_LLM_RESPONSE_TOKENS: int = 300
+    SIMULATED_LLM_SEED: int = 42
+    GOOGLE_CERTS_URL: str = 'https://www.googleapis.com/oauth2/v1/certs'
+    GOOGLE_CERTS_REFRESH_MARGIN_SECONDS: int = 300
+    AUTH_TOKEN_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    TOPIC_CLASSIFICATION_CACHE_SIZE: int = 1024
+    TOPIC_CLASSIFIER_MODE: str = 'keywords'
+    TOPIC_EMBEDDING_THRESHOLD: float = 0.5
+    TOPIC_CATALOG_POLL_SECONDS: float = 30.0
+    PROMPT_CONTEXT_SHARE: float = 0.6
+    PROMPT_SUMMARY_MAX_TOKENS: int = 200
+    PROMPT_HISTORY_MAX_MESSAGES: int = 40
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings, parsing the environment only once.
+
+    The instance is frozen, so it can be shared freely between requests and
+    threads.
+    """
+    return Settings()
+
+
+def reload_settings() -> Settings:
+    """
+    Re-read the environment and the .env file.
+
+    Used by tests and by the SIGHUP handler installed in the app lifespan.
+    Components that copied values when they were built (RagService, the LLM
+    strategies, the executors) keep the old values until they are rebuilt.
+    """
+    get_settings.cache_clear()
+    return get_settings()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, func
 from app.config.database import Base
 
 
@@ -9,6 +9,10 @@ class AnonymousQuestion(Base):
     id = Column(Integer, primary_key=True, index=True)
     topic = Column(String(255), nullable=False, index=True)  # Tema da dúvida
     question = Column(Text, nullable=False)  # Pergunta do usuário
+    # Tema definido pelo classificador (e não escolhido pelo usuário)
+    topic_detected = Column(
+        Boolean, default=False, server_default='false', nullable=False
+    )
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), nullable=False)
     
     def __repr__(self):
@@ -1,9 +1,9 @@
 from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
-from sqlalchemy.types import JSON
 
 from app.config.database import Base
+from app.models.chat_message import ChatMessage
 
 
 class ChatHistory(Base):
@@ -11,8 +11,45 @@ class ChatHistory(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    chat_messages = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     # Relacionamento com o usuário
-    user = relationship('User', back_populates='chat_histories') 
\ No newline at end of file
+    user = relationship('User', back_populates='chat_histories')
+    # Mensagens da conversa, gravadas uma linha por mensagem
+    messages = relationship(
+        'ChatMessage',
+        back_populates='chat_history',
+        order_by=ChatMessage.seq,
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+    )
+
+    @property
+    def chat_messages(self) -> dict:
+        """Conversa no formato {'messages': [...]} usado pelos schemas."""
+        return {'messages': [message.to_dict() for message in self.messages]}
+
+    @chat_messages.setter
+    def chat_messages(self, value: dict | None) -> None:
+        """
+        Substitui a conversa inteira. Linhas já gravadas são reaproveitadas
+        na mesma posição, então só o que mudou é escrito.
+        """
+        new_messages = (value or {}).get('messages', [])
+
+        for current, new in zip(self.messages, new_messages):
+            if current.role != new['role']:
+                current.role = new['role']
+            if current.content != new['content']:
+                current.content = new['content']
+
+        del self.messages[len(new_messages):]
+
+        for seq in range(len(self.messages), len(new_messages)):
+            self.messages.append(
+                ChatMessage(
+                    seq=seq,
+                    role=new_messages[seq]['role'],
+                    content=new_messages[seq]['content'],
+                )
+            )
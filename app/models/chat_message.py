@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.orm import relationship
+
+from app.config.database import Base
+
+
+class ChatMessage(Base):
+    __tablename__ = 'chat_messages'
+
+    id = Column(Integer, primary_key=True)
+    chat_history_id = Column(
+        Integer,
+        ForeignKey('chat_histories.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    # Posição da mensagem na conversa, começando em 0
+    seq = Column(Integer, nullable=False)
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    chat_history = relationship('ChatHistory', back_populates='messages')
+
+    __table_args__ = (
+        Index(
+            'ix_chat_messages_history_seq',
+            'chat_history_id',
+            'seq',
+            unique=True,
+        ),
+    )
+
+    def to_dict(self) -> dict:
+        return {'role': self.role, 'content': self.content}
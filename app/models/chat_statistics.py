@@ -26,7 +26,32 @@ class ChatStatistics(Base):
     response_time_ms = Column(Float, nullable=True)  # Tempo de resposta em millisegundos
     rag_context_found = Column(Boolean, default=False, nullable=False)  # Se encontrou contexto RAG
     llm_provider = Column(String(50), nullable=True)  # Qual LLM foi usado
+    # Se o cliente saiu antes do fim da resposta
+    client_disconnected = Column(
+        Boolean, default=False, server_default='false', nullable=False
+    )
+    # Estimativa de tokens não gerados por causa da desconexão
+    tokens_saved = Column(Integer, nullable=True)
     
+    # Uso de tokens informado pelo provedor (0 quando não há chamada ao LLM)
+    # Tokens de entrada fora do cache de prompt
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)  # Tokens gerados
+    # Tokens lidos do e gravados no cache de prompt
+    cache_read_tokens = Column(Integer, nullable=True)
+    cache_write_tokens = Column(Integer, nullable=True)
+
+    # Latência por estágio do pipeline, em millisegundos
+    user_lookup_ms = Column(Float, nullable=True)  # Busca do usuário
+    history_load_ms = Column(Float, nullable=True)  # Carga do histórico
+    question_detection_ms = Column(Float, nullable=True)  # Dúvida anônima
+    embedding_ms = Column(Float, nullable=True)  # Embedding da pergunta
+    vector_query_ms = Column(Float, nullable=True)  # Busca no Chroma e BM25
+    ttft_ms = Column(Float, nullable=True)  # Tempo até o primeiro token do LLM
+    generation_ms = Column(Float, nullable=True)  # Do primeiro ao último token
+    # Do fim do stream até as mensagens gravadas
+    persistence_ms = Column(Float, nullable=True)
+
     # Informações temporais (UTC-3 - Horário de Brasília)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone(timedelta(hours=-3))), nullable=False)
     hour_of_day = Column(Integer, nullable=False)  # Hora do dia (0-23) em UTC-3
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Text
+
+from app.config.database import Base
+
+
+class Topic(Base):
+    """Definição de um tópico usada pelo classificador de dúvidas"""
+
+    __tablename__ = 'topics'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False, unique=True)
+    description = Column(Text, nullable=False, default='')
+    keywords = Column(JSON, nullable=False, default=list)
+    patterns = Column(JSON, nullable=False, default=list)  # Regex
+    priority = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return (
+            f"<Topic(id={self.id}, name='{self.name}', "
+            f"priority={self.priority})>"
+        )
+
+
+class TopicCatalogVersion(Base):
+    """
+    Versão do catálogo de tópicos, em uma única linha. Toda alteração em
+    ``topics`` a incrementa na mesma transação; os workers comparam a versão
+    para saber quando recarregar o classificador.
+    """
+
+    __tablename__ = 'topic_catalog_version'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
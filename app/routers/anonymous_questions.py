@@ -1,5 +1,15 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Security, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    Security,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.config.database import get_db
@@ -10,9 +20,19 @@ from app.schemas.anonymous_question import (
     AnonymousQuestionsList,
     AnonymousQuestionStats
 )
+from app.schemas.topic import (
+    TopicDefinitionCreate,
+    TopicDefinitionResponse,
+    TopicDefinitionUpdate
+)
 from app.services.anonymous_questions.anonymous_question_service import AnonymousQuestionService
+from app.services.anonymous_questions.topic_catalog import (
+    TopicCatalogService,
+    refresh_topic_classifier
+)
 from app.services.users.get_user_by_email_use_case import GetUserByEmailUseCase
-from app.utils.security import get_current_user
+from app.services.users.user_cache import CachedUser
+from app.utils.security import get_current_admin_user, get_current_user
 
 router = APIRouter(tags=["Questions"])
 
@@ -70,7 +90,7 @@ async def get_questions(
             detail='Could not validate credentials'
         )
     
-    user = GetUserByEmailUseCase.execute(db, email=user_email)
+    user = GetUserByEmailUseCase.execute_cached(db, email=user_email)
     if not user or user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -117,7 +137,7 @@ async def get_question_stats(
             detail='Could not validate credentials'
         )
     
-    user = GetUserByEmailUseCase.execute(db, email=user_email)
+    user = GetUserByEmailUseCase.execute_cached(db, email=user_email)
     if not user or user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -159,7 +179,7 @@ async def get_common_topics(
             detail='Could not validate credentials'
         )
     
-    user = GetUserByEmailUseCase.execute(db, email=user_email)
+    user = GetUserByEmailUseCase.execute_cached(db, email=user_email)
     if not user or user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -262,4 +282,109 @@ async def get_topic_details(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar detalhes do tópico: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/anonymous-questions/topics/definitions",
+    response_model=list[TopicDefinitionResponse],
+    summary="Definições de tópicos",
+    description=(
+        "Lista as definições de tópicos usadas pelo classificador "
+        "(apenas para admins)"
+    ),
+)
+async def list_topic_definitions(
+    db: Session = Depends(get_db),
+    current_admin: CachedUser = Depends(get_current_admin_user)
+):
+    """
+    Lista as definições de tópicos do catálogo, com palavras-chave e padrões.
+    """
+    return TopicCatalogService(db).list_topics()
+
+
+@router.post(
+    "/anonymous-questions/topics/definitions",
+    response_model=TopicDefinitionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Criar tópico",
+    description="Cria uma definição de tópico (apenas para admins)"
+)
+async def create_topic_definition(
+    topic: TopicDefinitionCreate,
+    db: Session = Depends(get_db),
+    current_admin: CachedUser = Depends(get_current_admin_user)
+):
+    """
+    Cria um tópico. Este worker passa a usá-lo na hora; os demais, na
+    próxima verificação do catálogo (TOPIC_CATALOG_POLL_SECONDS).
+    """
+    try:
+        created = TopicCatalogService(db).create_topic(topic)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Já existe um tópico chamado '{topic.name}'"
+        )
+
+    await run_in_threadpool(refresh_topic_classifier)
+    return created
+
+
+@router.patch(
+    "/anonymous-questions/topics/definitions/{topic_id}",
+    response_model=TopicDefinitionResponse,
+    summary="Editar tópico",
+    description="Altera campos de uma definição de tópico (apenas para admins)"
+)
+async def update_topic_definition(
+    topic_id: int,
+    topic: TopicDefinitionUpdate,
+    db: Session = Depends(get_db),
+    current_admin: CachedUser = Depends(get_current_admin_user)
+):
+    """
+    Altera um tópico; só os campos enviados mudam.
+    """
+    try:
+        updated = TopicCatalogService(db).update_topic(topic_id, topic)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Já existe um tópico chamado '{topic.name}'"
+        )
+
+    if not updated:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tópico não encontrado"
+        )
+
+    await run_in_threadpool(refresh_topic_classifier)
+    return updated
+
+
+@router.delete(
+    "/anonymous-questions/topics/definitions/{topic_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Remover tópico",
+    description="Remove uma definição de tópico (apenas para admins)"
+)
+async def delete_topic_definition(
+    topic_id: int,
+    db: Session = Depends(get_db),
+    current_admin: CachedUser = Depends(get_current_admin_user)
+):
+    """
+    Remove um tópico. Dúvidas já classificadas nele mantêm o tema até
+    uma reclassificação (task reclassify).
+    """
+    if not TopicCatalogService(db).delete_topic(topic_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tópico não encontrado"
+        )
+
+    await run_in_threadpool(refresh_topic_classifier)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
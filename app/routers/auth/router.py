@@ -11,7 +11,7 @@ from fastapi import (
 from fastapi.responses import RedirectResponse
 
 from app.config.database import DbSession
-from app.config.settings import Settings
+from app.config.settings import get_settings
 from app.schemas.user import UserCreate
 from app.services.users.create_user_use_case import CreateUserUseCase
 from app.utils.security import get_current_user
@@ -31,7 +31,7 @@ async def login_google():
     ]
     scope_string = '%20'.join(scopes)
     return RedirectResponse(
-        url=f'https://accounts.google.com/o/oauth2/auth?response_type=code&client_id={Settings().GOOGLE_CLIENT_ID}&redirect_uri={Settings().GOOGLE_REDIRECT_URI}&scope={scope_string}&access_type=offline&prompt=consent',
+        url=f'https://accounts.google.com/o/oauth2/auth?response_type=code&client_id={get_settings().GOOGLE_CLIENT_ID}&redirect_uri={get_settings().GOOGLE_REDIRECT_URI}&scope={scope_string}&access_type=offline&prompt=consent',
         status_code=302,
     )
 
@@ -41,9 +41,9 @@ async def auth_google(code: str, db: DbSession):
     token_url = 'https://accounts.google.com/o/oauth2/token'
     data = {
         'code': code,
-        'client_id': Settings().GOOGLE_CLIENT_ID,
-        'client_secret': Settings().GOOGLE_SECRET_KEY,
-        'redirect_uri': Settings().GOOGLE_REDIRECT_URI,
+        'client_id': get_settings().GOOGLE_CLIENT_ID,
+        'client_secret': get_settings().GOOGLE_SECRET_KEY,
+        'redirect_uri': get_settings().GOOGLE_REDIRECT_URI,
         'grant_type': 'authorization_code',
     }
     response = requests.post(token_url, data=data)
@@ -94,7 +94,7 @@ async def auth_google(code: str, db: DbSession):
     ).decode('utf-8')
 
     return RedirectResponse(
-        url=f'{Settings().FRONTEND_URL}/google/callback?user={user_credentials_b64}',
+        url=f'{get_settings().FRONTEND_URL}/google/callback?user={user_credentials_b64}',
         status_code=302,
     )
 
@@ -103,8 +103,8 @@ async def auth_google(code: str, db: DbSession):
 @router.post('/refresh')
 async def refresh_google_token(refresh_token):
     params = {
-        'client_id': Settings().GOOGLE_CLIENT_ID,
-        'client_secret': Settings().GOOGLE_SECRET_KEY,
+        'client_id': get_settings().GOOGLE_CLIENT_ID,
+        'client_secret': get_settings().GOOGLE_SECRET_KEY,
         'refresh_token': refresh_token,
         'grant_type': 'refresh_token',
     }
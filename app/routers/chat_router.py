@@ -1,42 +1,103 @@
-from typing import AsyncGenerator
-import chromadb
+import asyncio
+import logging
 import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Security, status
+import anyio
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Security,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 from starlette.responses import StreamingResponse
 
 from app.config.database import get_db
+from app.config.settings import get_settings
 from app.schemas.chat import ChatRequest
-from app.schemas.chat_history import ChatHistoryCreate, ChatHistoryUpdate
+from app.schemas.chat_history import ChatHistoryCreate
+from app.services.anonymous_questions.anonymous_question_service import (
+    AnonymousQuestionService,
+)
 from app.services.chat_history import ChatHistoryService
-from app.services.llm.llm_service import LLMService
-from app.services.rag.rag_service import RagService
+from app.services.chat_history.turn_writer import (
+    ChatTurnRecord,
+    get_chat_turn_writer,
+)
+from app.services.chat_statistics.chat_statistics_service import (
+    MessageMetrics,
+)
+from app.services.llm.admission import (
+    AdmissionRejectedError,
+    get_admission_controller,
+)
+from app.services.llm.llm_service import (
+    LLMProviderError,
+    LLMService,
+    LLMUsage,
+)
+from app.services.llm.prompt_builder import (
+    BuiltPrompt,
+    estimate_tokens,
+    get_prompt_builder,
+)
+from app.services.llm.semantic_cache import (
+    CachedAnswer,
+    SemanticAnswerCache,
+    get_answer_cache,
+    replay_answer,
+)
+from app.services.rag.rag_service import RagService, RagServiceDep
 from app.services.users.get_user_by_email_use_case import GetUserByEmailUseCase
-from app.services.anonymous_questions.anonymous_question_service import AnonymousQuestionService
-from app.services.chat_statistics.chat_statistics_service import ChatStatisticsService
+from app.utils.executor import ExecutorQueueFullError, get_retrieval_executor
 from app.utils.security import get_current_user
-
+from app.utils.streaming import DisconnectAwareStream, answer_lengths
+from app.utils.timing import StageTimer
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
 
-@router.post('/chat')
-async def chat(
+
+@dataclass
+class ChatTurnContext:
+    """Tudo o que o estágio de recuperação produz para um turno do chat."""
+
+    user_id: int
+    history_id: int
+    chat_messages: list
+    start_time: float
+    context_chunks: List[str] = field(default_factory=list)
+    source_links: list = field(default_factory=list)
+    rag_context_found: bool = False
+    query_embedding: Optional[List[float]] = None
+    chunk_ids: List[str] = field(default_factory=list)
+    detected_topic: Optional[str] = None
+    timer: StageTimer = field(default_factory=StageTimer)
+
+
+def _prepare_chat_turn(
+    db: Session,
+    rag_service: RagService,
     request: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user: dict = Security(get_current_user),
-) -> StreamingResponse:
+    user_email: str,
+) -> ChatTurnContext:
+    """
+    Executa o estágio bloqueante do chat: usuário, histórico, detecção de
+    dúvida e busca RAG. Roda no executor de recuperação, fora do event loop.
+    """
     chat_history_service = ChatHistoryService(db)
-    user_email = current_user.get('email')
-
-    if not user_email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Could not validate credentials, email not found.',
-        )
+    timer = StageTimer()
 
-    user = GetUserByEmailUseCase.execute(db, email=user_email)
+    with timer.stage('user_lookup_ms'):
+        user = GetUserByEmailUseCase.execute_cached(db, email=user_email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,165 +109,393 @@ async def chat(
     # Inicia medição de tempo para estatísticas
     start_time = time.time()
 
-    if request.chat_history_id:
-        history = chat_history_service.get_chat_history(
-            request.chat_history_id
-        )
-        if history and history.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail='You do not have permission to access this chat history.',
+    with timer.stage('history_load_ms'):
+        if request.chat_history_id:
+            history = chat_history_service.get_chat_history(
+                request.chat_history_id
             )
-    else:
-        history = None
-
-    if not history:
-        chat_history_create = ChatHistoryCreate(
-            chat_messages={'messages': []},
-            user_id=user_id
-        )
-        history = chat_history_service.create_chat_history(
-            user_id=user_id, chat_history=chat_history_create
-        )
+            if history and history.user_id != user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=(
+                        'You do not have permission to access this chat '
+                        'history.'
+                    ),
+                )
+        else:
+            history = None
 
-    history_id = history.id
-    
-    chat_messages = (
-        history.chat_messages.get('messages', [])
-        if history.chat_messages
-        else []
-    )
+        if not history:
+            chat_history_create = ChatHistoryCreate(
+                chat_messages={'messages': []},
+                user_id=user_id
+            )
+            history = chat_history_service.create_chat_history(
+                user_id=user_id, chat_history=chat_history_create
+            )
 
-    prompt_messages = []
-    for msg in chat_messages:
-        prompt_messages.append({'role': msg['role'], 'content': msg['content']})
+        turn = ChatTurnContext(
+            user_id=user_id,
+            history_id=history.id,
+            chat_messages=(
+                chat_history_service.get_messages(
+                    history.id,
+                    limit=get_settings().PROMPT_HISTORY_MAX_MESSAGES,
+                )
+                if request.chat_history_id
+                else []
+            ),
+            start_time=start_time,
+            timer=timer,
+        )
 
     user_message = request.message
-    llm_message = user_message
-    context = ''
-    source_links = []
-    rag_context_found = False
+    is_challenge = user_message.startswith('/desafio')
+
+    # O embedding da pergunta serve à busca e, no modo por embeddings, à
+    # classificação do tópico. Se ele falhar, o turno segue sem contexto
+    # RAG, como quando a busca falha.
+    if not is_challenge:
+        with timer.stage('embedding_ms'):
+            try:
+                turn.query_embedding = rag_service.embed_query(user_message)
+            except Exception as e:
+                logger.error(f'Erro ao gerar o embedding da pergunta: {e}')
     
-    # Detecta e salva dúvida anônima
+    # Classifica o tópico uma vez por turno e detecta e salva dúvida anônima
     try:
         anonymous_service = AnonymousQuestionService(db)
-        detected_question = anonymous_service.detect_and_save_question(
-            message=user_message,
-            context=""  # Ainda não temos o contexto aqui
-        )
+        with timer.stage('question_detection_ms'):
+            turn.detected_topic = anonymous_service.topic_agent.classify_topic(
+                user_message, embedding=turn.query_embedding
+            )
+            detected_question = anonymous_service.detect_and_save_question(
+                message=user_message,
+                context="",  # Ainda não temos o contexto aqui
+                topic=turn.detected_topic
+            )
         if detected_question:
             print(f"Dúvida anônima salva: {detected_question.topic} - {detected_question.question[:50]}...")
     except Exception as e:
         print(f"Erro ao salvar dúvida anônima: {e}")
         # Não falhamos o chat por causa disso
     
-    try:
-        if not user_message.startswith('/desafio'):
-            rag_service = RagService()
-            search_results = rag_service.search(query=user_message)
-            
-            # Extract content and collect unique source links
-            context_parts = []
-            seen_links = set()
-            
-            for result in search_results:
-                context_parts.append(result["content"])
-                
-                # Collect unique Google Drive links
-                metadata = result.get("metadata", {})
-                drive_link = metadata.get("drive_link")
-                source_name = metadata.get("source")
-                
-                if drive_link and drive_link not in seen_links:
-                    seen_links.add(drive_link)
-                    source_links.append({
-                        "name": source_name,
-                        "link": drive_link
-                    })
-            
-            context = '\n'.join(context_parts)
-            rag_context_found = len(context_parts) > 0
-    finally:
-        chromadb.api.client.SharedSystemClient.clear_system_cache()
-
-    if user_message.startswith('/desafio'):
-        topic = user_message.replace('/desafio', '').strip()
-        if topic:
-            llm_message = f'Crie um desafio sobre o seguinte tópico: {topic}'
-        else:
-            llm_message = 'Crie um desafio com base no contexto da nossa conversa até agora.'
-    elif context:
-        llm_message = f"""
-        Baseado no seguinte contexto, responda a pergunta.
+    if turn.query_embedding is not None:
+        with timer.stage('vector_query_ms'):
+            search_results = rag_service.search(
+                query=user_message, query_embedding=turn.query_embedding
+            )
+        _add_search_results(turn, search_results)
 
-        Contexto:
-        {context}
+    return turn
 
-        Pergunta: {user_message}
-        """
 
-    async def stream_response() -> AsyncGenerator[str, None]:
-        prompt_messages.append({'role': 'user', 'content': llm_message})
+def _add_search_results(turn: ChatTurnContext, search_results: list) -> None:
+    """Guarda no turno os trechos encontrados e os links de suas fontes."""
+    turn.chunk_ids = [result["id"] for result in search_results]
+
+    # Extract content and collect unique source links
+    seen_links = set()
+
+    for result in search_results:
+        turn.context_chunks.append(result["content"])
 
-        prompt_text = '\n'.join(
-            [f"{m['role']}: {m['content']}" for m in prompt_messages]
+        # Collect unique Google Drive links
+        metadata = result.get("metadata", {})
+        drive_link = metadata.get("drive_link")
+        source_name = metadata.get("source")
+
+        if drive_link and drive_link not in seen_links:
+            seen_links.add(drive_link)
+            turn.source_links.append({
+                "name": source_name,
+                "link": drive_link
+            })
+
+    turn.rag_context_found = len(turn.context_chunks) > 0
+
+
+def _challenge_question(message: str) -> Optional[str]:
+    """Pedido ao LLM para um comando ``/desafio``, ou None se não for um."""
+    if not message.startswith('/desafio'):
+        return None
+
+    topic = message.replace('/desafio', '').strip()
+    if topic:
+        return f'Crie um desafio sobre o seguinte tópico: {topic}'
+    return 'Crie um desafio com base no contexto da nossa conversa até agora.'
+
+
+def _answer_chunks(
+    cached_answer: Optional[CachedAnswer],
+    prompt: BuiltPrompt,
+    usage: LLMUsage,
+) -> AsyncIterator[str]:
+    """Repete a resposta do cache semântico ou pede uma nova ao LLM."""
+    if cached_answer is not None:
+        return replay_answer(cached_answer)
+
+    return LLMService().execute(
+        prompt=prompt.conversation,
+        context=prompt.context,
+        usage=usage,
+    )
+
+
+def _remember_answer(
+    turn: ChatTurnContext,
+    answer_cache: Optional[SemanticAnswerCache],
+    answer: str,
+) -> None:
+    """
+    Registra o tamanho de uma resposta gerada pelo LLM e, se o turno usa o
+    cache semântico, a guarda nele.
+    """
+    answer_lengths.observe(estimate_tokens(answer))
+
+    if answer_cache is not None:
+        answer_cache.store(
+            turn.query_embedding,
+            turn.chunk_ids,
+            turn.context_chunks,
+            answer,
         )
 
-        llm_service = LLMService()
-        response_iterator = llm_service.execute(prompt=prompt_text)
 
-        llm_response_content = ''
-        async for chunk in response_iterator:
-            llm_response_content += chunk
-            yield chunk
-
-        # Add source links at the end of the response
-        if source_links and not user_message.startswith('/desafio'):
-            links_section = "\n\n**Fontes consultadas:**\n"
-            for source in source_links:
-                links_section += f"- [{source['name']}]({source['link']})\n"
-            
-            # Yield the links section
-            for char in links_section:
-                yield char
-            
-            # Add links to the response content for storage
-            llm_response_content += links_section
-
-        chat_messages.append({'role': 'user', 'content': request.message})
-        chat_messages.append(
-            {'role': 'assistant', 'content': llm_response_content}
+def _links_section(source_links: list) -> str:
+    """Lista das fontes consultadas, anexada ao fim da resposta."""
+    links_section = "\n\n**Fontes consultadas:**\n"
+    for source in source_links:
+        links_section += f"- [{source['name']}]({source['link']})\n"
+    return links_section
+
+
+def _turn_metrics(
+    turn: ChatTurnContext,
+    usage: LLMUsage,
+    answer: str,
+    *,
+    from_cache: bool,
+    client_disconnected: bool,
+) -> MessageMetrics:
+    """Medições do turno para a estatística da mensagem."""
+    settings = get_settings()
+
+    # Com o cliente desconectado, estima os tokens que o LLM deixou de gerar
+    tokens_saved = None
+    if client_disconnected and not from_cache:
+        tokens_saved = answer_lengths.tokens_saved(
+            estimate_tokens(answer),
+            settings.LLM_MAX_TOKENS,
+        )
+
+    return MessageMetrics(
+        response_time_ms=(time.time() - turn.start_time) * 1000,
+        rag_context_found=turn.rag_context_found,
+        llm_provider=(
+            'cache' if from_cache else settings.LLM_PROVIDER.lower()
+        ),
+        client_disconnected=client_disconnected,
+        tokens_saved=tokens_saved,
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cache_read_tokens=usage.cache_read_tokens,
+        cache_write_tokens=usage.cache_write_tokens,
+        stage_ms=turn.timer.durations,
+    )
+
+
+@router.post('/chat')
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    rag_service: RagServiceDep,
+    db: Session = Depends(get_db),
+    current_user: dict = Security(get_current_user),
+) -> StreamingResponse:
+    user_email = current_user.get('email')
+
+    if not user_email:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Could not validate credentials, email not found.',
+        )
+
+    try:
+        turn = await get_retrieval_executor().run(
+            _prepare_chat_turn, db, rag_service, request, user_email
+        )
+    except ExecutorQueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Servidor ocupado, tente novamente em instantes.',
+            headers={'Retry-After': '1'},
         )
 
-        update_data = ChatHistoryUpdate(
-            chat_messages={'messages': chat_messages}
+    settings = get_settings()
+    challenge = _challenge_question(request.message)
+
+    prompt = get_prompt_builder().build(
+        question=challenge or request.message,
+        history=turn.chat_messages,
+        context_chunks=[] if challenge else turn.context_chunks,
+    )
+
+    # Só perguntas de primeiro turno com contexto RAG passam pelo cache
+    # semântico: com histórico, a resposta depende da conversa.
+    answer_cache = get_answer_cache()
+    use_answer_cache = (
+        answer_cache is not None
+        and not turn.chat_messages
+        and turn.rag_context_found
+        and turn.query_embedding is not None
+    )
+    cached_answer = (
+        answer_cache.lookup(
+            turn.query_embedding, turn.chunk_ids, turn.context_chunks
         )
-        
-        # Cria uma nova instância do serviço com uma nova sessão para evitar problemas de concorrência
-        from app.config.database import SessionLocal
-        with SessionLocal() as new_db:
-            new_chat_history_service = ChatHistoryService(new_db)
-            new_chat_history_service.update_chat_history(
-                chat_history_id=history_id,
-                chat_history=update_data,
+        if use_answer_cache
+        else None
+    )
+
+    # Respostas do cache não chamam o LLM e não ocupam vaga
+    ticket = None
+    if cached_answer is None:
+        try:
+            ticket = await get_admission_controller().acquire(turn.user_id)
+        except AdmissionRejectedError as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=(
+                    'Muitas requisições ao assistente, '
+                    'tente novamente em instantes.'
+                ),
+                headers={'Retry-After': str(e.retry_after)},
             )
-            
-            # Registra estatísticas da mensagem
+
+    def release_ticket() -> None:
+        if ticket is not None:
+            ticket.release()
+
+    usage = LLMUsage()
+
+    async def stream_response() -> AsyncGenerator[str, None]:
+        stream = DisconnectAwareStream(
+            http_request,
+            _answer_chunks(cached_answer, prompt, usage),
+            poll_interval=settings.STREAM_DISCONNECT_POLL_SECONDS,
+        )
+        llm_response_content = ''
+        answer_finished = False
+        generation_failed = False
+        response_closed = False
+
+        stream_start = time.perf_counter()
+        first_chunk_at = None
+
+        try:
             try:
-                end_time = time.time()
-                response_time_ms = (end_time - start_time) * 1000  # Converte para ms
-                
-                stats_service = ChatStatisticsService(new_db)
-                stats_service.create_message_statistic(
-                    message=user_message,
-                    user_id=user_id,
-                    user_email=user_email,
-                    response_time_ms=response_time_ms,
-                    rag_context_found=rag_context_found,
-                    llm_provider="claude"  # Pode ser configurável no futuro
+                async with aclosing(aiter(stream)) as chunks:
+                    async for chunk in chunks:
+                        if first_chunk_at is None:
+                            first_chunk_at = time.perf_counter()
+                            turn.timer.record(
+                                'ttft_ms',
+                                (first_chunk_at - stream_start) * 1000,
+                            )
+                        llm_response_content += chunk
+                        yield chunk
+            except LLMProviderError as e:
+                # A mensagem de erro é mostrada ao usuário, mas não é uma
+                # resposta: não entra no cache nem na média de tamanho
+                logger.error(f'Erro do provedor de LLM: {e}')
+                generation_failed = True
+                llm_response_content += str(e)
+                yield str(e)
+
+            if first_chunk_at is not None:
+                turn.timer.record(
+                    'generation_ms',
+                    (time.perf_counter() - first_chunk_at) * 1000,
                 )
-            except Exception as e:
-                print(f"Erro ao registrar estatísticas: {e}")
-                # Não falhamos o chat por causa das estatísticas
 
-    return StreamingResponse(stream_response(), media_type='text/event-stream') 
\ No newline at end of file
+            answer_finished = not stream.disconnected
+            if not answer_finished:
+                return
+
+            if cached_answer is None and not generation_failed:
+                _remember_answer(
+                    turn,
+                    answer_cache if use_answer_cache else None,
+                    llm_response_content,
+                )
+
+            # Add source links at the end of the response
+            if turn.source_links and challenge is None:
+                links_section = _links_section(turn.source_links)
+
+                # Add links to the response content for storage
+                llm_response_content += links_section
+
+                # Yield the links section
+                for char in links_section:
+                    yield char
+        except (GeneratorExit, asyncio.CancelledError):
+            # O servidor fechou a resposta porque o cliente foi embora
+            response_closed = True
+            raise
+        finally:
+            release_ticket()
+
+            # Roda também quando o cliente desconecta: a resposta parcial é
+            # gravada e a estatística registra os tokens economizados
+            metrics = _turn_metrics(
+                turn,
+                usage,
+                llm_response_content,
+                from_cache=cached_answer is not None,
+                client_disconnected=stream.disconnected or (
+                    response_closed and not answer_finished
+                ),
+            )
+            await _persist_turn(
+                ChatTurnRecord(
+                    history_id=turn.history_id,
+                    new_messages=[
+                        {'role': 'user', 'content': request.message},
+                        {'role': 'assistant', 'content': llm_response_content},
+                    ],
+                    statistic={
+                        'message': request.message,
+                        'user_id': turn.user_id,
+                        'user_email': user_email,
+                        'detected_topic': turn.detected_topic,
+                        'metrics': metrics,
+                    },
+                )
+            )
+
+    # A tarefa em segundo plano libera a vaga caso o gerador nunca rode
+    return StreamingResponse(
+        stream_response(),
+        media_type='text/event-stream',
+        background=BackgroundTask(release_ticket),
+    )
+
+
+async def _persist_turn(record: ChatTurnRecord) -> None:
+    """
+    Entrega o turno ao writer em segundo plano. Com a fila cheia, grava
+    diretamente, protegido de cancelamento para não perder o turno.
+    """
+    writer = get_chat_turn_writer()
+    if writer.submit(record):
+        return
+
+    with anyio.CancelScope(shield=True):
+        try:
+            await run_in_threadpool(writer.write_batch, [record])
+        except Exception:
+            logger.exception(
+                f'Erro ao gravar turno do chat (histórico {record.history_id})'
+            )
@@ -23,7 +23,7 @@ def _verify_admin_access(current_user: dict, db: Session):
             detail='Could not validate credentials'
         )
     
-    user = GetUserByEmailUseCase.execute(db, email=user_email)
+    user = GetUserByEmailUseCase.execute_cached(db, email=user_email)
     if not user or user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -52,6 +52,7 @@ async def get_stats(
     - Tópicos mais populares
     - Horário de maior uso
     - Dia da semana mais ativo
+    - Latência média, p50 e p95 de cada estágio do chat
     """
     _verify_admin_access(current_user, db)
     
@@ -67,6 +68,7 @@ async def get_stats(
         summary = service.get_summary_statistics(filters)
         time_stats = service.get_statistics_by_time(filters)
         topic_stats = service.get_statistics_by_topic(filters)
+        latency_stats = service.get_latency_breakdown(filters)
         
         peak_hour = None
         peak_day = None
@@ -105,7 +107,10 @@ async def get_stats(
                 "hour": peak_hour,
                 "day": peak_day
             },
-            "top_topics": top_topics
+            "top_topics": top_topics,
+            "latency_breakdown": [
+                stage.model_dump() for stage in latency_stats
+            ]
         }
         
     except Exception as e:
@@ -21,7 +21,8 @@ from app.services.documents.delete_all_documents_use_case import (
 from app.services.documents.get_all_documents_use_case import (
     GetAllDocumentsUseCase,
 )
-from app.services.rag.rag_service import RagService
+from app.services.llm.semantic_cache import invalidate_answer_cache
+from app.services.rag.rag_service import RagServiceDep
 from app.utils.security import get_current_user
 
 router = APIRouter(tags=['Document'])
@@ -105,11 +106,12 @@ async def get_documents_paginated(
 )
 async def upload_document(
     db: DbSession,
+    rag_service: RagServiceDep,
     file: UploadFile = File(...),
     user_info: dict = Security(get_current_user),
 ):
     document, error = CreateDocumentUseCase.execute(
-        db, user_info['email'], file
+        db, user_info['email'], file, rag_service=rag_service
     )
 
     if error:
@@ -124,10 +126,13 @@ async def upload_document(
 @router.delete('/delete')
 async def delete_document(
     db: DbSession,
+    rag_service: RagServiceDep,
     g_file_id: str,
     user: dict = Security(get_current_user),
 ):
-    _, error = DeleteDocumentUseCase.execute(db, g_file_id)
+    _, error = DeleteDocumentUseCase.execute(
+        db, g_file_id, rag_service=rag_service
+    )
 
     if error:
         raise HTTPException(
@@ -142,6 +147,7 @@ async def delete_document(
 )
 async def delete_all_documents(
     db: DbSession,
+    rag_service: RagServiceDep,
     user_info: dict = Security(get_current_user),
 ):
     """
@@ -174,7 +180,9 @@ async def delete_all_documents(
     
     Retorna um relatório detalhado com o resultado da deleção em cada sistema.
     """
-    deletion_report, error = DeleteAllDocumentsUseCase.execute(db)
+    deletion_report, error = DeleteAllDocumentsUseCase.execute(
+        db, rag_service=rag_service
+    )
 
     if error:
         raise HTTPException(
@@ -187,12 +195,12 @@ async def delete_all_documents(
 
 @router.get('/list-chromadb')
 async def list_chromadb_documents(
+    rag_service: RagServiceDep,
     limit: int = 100,
     user: dict = Security(get_current_user),
 ):
     """List all documents stored in ChromaDB."""
     try:
-        rag_service = RagService()
         documents = rag_service.list_documents(limit=limit)
         collection_info = rag_service.get_collection_info()
         
@@ -206,11 +214,11 @@ async def list_chromadb_documents(
 
 @router.get('/chromadb-info')
 async def get_chromadb_info(
+    rag_service: RagServiceDep,
     user: dict = Security(get_current_user),
 ):
     """Get ChromaDB collection information."""
     try:
-        rag_service = RagService()
         info = rag_service.get_collection_info()
         return info
     except Exception as e:
@@ -219,26 +227,46 @@ async def get_chromadb_info(
 
 @router.delete('/chromadb/delete-by-file-id')
 async def delete_chromadb_by_file_id(
+    rag_service: RagServiceDep,
     g_file_id: str,
     user: dict = Security(get_current_user),
 ):
     """Delete document from ChromaDB by Google Drive file ID."""
     try:
-        rag_service = RagService()
         result = rag_service.delete_by_g_file_id(g_file_id)
+        invalidate_answer_cache()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting from ChromaDB: {str(e)}")
 
 
+@router.delete('/chromadb/delete-by-file-ids')
+async def delete_chromadb_by_file_ids(
+    rag_service: RagServiceDep,
+    g_file_ids: List[str] = Query(...),
+    user: dict = Security(get_current_user),
+):
+    """Delete several documents from ChromaDB by Google Drive file IDs."""
+    try:
+        result = rag_service.delete_by_g_file_ids(g_file_ids)
+        invalidate_answer_cache()
+        return result
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f'Error deleting from ChromaDB: {str(e)}',
+        )
+
+
 @router.delete('/chromadb/delete-all')
 async def delete_all_chromadb_documents(
+    rag_service: RagServiceDep,
     user: dict = Security(get_current_user),
 ):
     """Delete ALL documents from ChromaDB collection."""
     try:
-        rag_service = RagService()
         result = rag_service.delete_all_documents()
+        invalidate_answer_cache()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting all documents: {str(e)}")
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, HTTPException, Security
+from contextlib import aclosing
+
+from fastapi import APIRouter, HTTPException, Request, Security
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
-from app.services.llm.llm_service import LLMService
-from app.utils.security import get_current_user
+from app.config.settings import get_settings
+from app.services.llm.admission import (
+    AdmissionRejectedError,
+    get_admission_controller,
+)
+from app.services.llm.llm_service import LLMProviderError, LLMService
+from app.services.users.user_cache import CachedUser
+from app.utils.security import get_current_registered_user
+from app.utils.streaming import DisconnectAwareStream
 
 router = APIRouter(tags=['LLM'])
 
@@ -15,18 +25,43 @@ class Prompt(BaseModel):
 @router.post('/generate')
 async def generate(
     prompt: Prompt,
-    user_info: dict = Security(get_current_user),
+    http_request: Request,
+    user: CachedUser = Security(get_current_registered_user),
 ):
+    # Mesma chave que o /chat usa, para que a cota por usuário seja uma só
+    try:
+        ticket = await get_admission_controller().acquire(user.id)
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={'Retry-After': str(e.retry_after)},
+        )
+
     try:
 
         async def generate():
-            for text_chunk in LLMService().execute(prompt.message):
-                yield text_chunk
-            yield '\n'
+            stream = DisconnectAwareStream(
+                http_request,
+                LLMService().execute(prompt.message),
+                poll_interval=get_settings().STREAM_DISCONNECT_POLL_SECONDS,
+            )
+            try:
+                async with aclosing(aiter(stream)) as chunks:
+                    async for text_chunk in chunks:
+                        yield text_chunk
+            except LLMProviderError as e:
+                yield str(e)
+            finally:
+                ticket.release()
+
+            if not stream.disconnected:
+                yield '\n'
 
         return StreamingResponse(
             generate(),
             media_type='text/event-stream',
+            background=BackgroundTask(ticket.release),
             headers={
                 'Cache-Control': 'no-cache',
                 'Content-Type': 'text/event-stream',
@@ -35,6 +70,7 @@ async def generate(
         )
 
     except Exception as e:
+        ticket.release()
         raise HTTPException(
             status_code=500,
             detail=f'An error occurred while generating text: {str(e)}',
@@ -6,6 +6,7 @@ from app.schemas.user import UserResponse, UserRoleUpdate
 from app.models.user import User, UserRole
 from app.utils.security import get_current_user, get_current_admin_user
 from app.services.users.update_user_role_use_case import UpdateUserRoleUseCase
+from app.services.users.user_cache import CachedUser
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -31,7 +32,7 @@ def read_users_me(
 @router.get("/admin/all", response_model=List[UserResponse])
 def list_all_users(
     db: DbSession,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: CachedUser = Depends(get_current_admin_user),
 ):
     """
     Lista todos os usuários do sistema.
@@ -45,7 +46,7 @@ def list_all_users(
 def grant_admin_role(
     user_role_update: UserRoleUpdate,
     db: DbSession,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: CachedUser = Depends(get_current_admin_user),
 ):
     """
     Concede direitos de administrador a um usuário.
@@ -70,7 +71,7 @@ def grant_admin_role(
 def revoke_admin_role(
     user_id: int,
     db: DbSession,
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: CachedUser = Depends(get_current_admin_user),
 ):
     """
     Remove direitos de administrador de um usuário.
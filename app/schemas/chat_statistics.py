@@ -15,6 +15,20 @@ class ChatStatisticsCreate(BaseModel):
     response_time_ms: Optional[float] = None
     rag_context_found: bool = False
     llm_provider: Optional[str] = None
+    client_disconnected: bool = False
+    tokens_saved: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    user_lookup_ms: Optional[float] = None
+    history_load_ms: Optional[float] = None
+    question_detection_ms: Optional[float] = None
+    embedding_ms: Optional[float] = None
+    vector_query_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    generation_ms: Optional[float] = None
+    persistence_ms: Optional[float] = None
     hour_of_day: int = Field(..., ge=0, le=23)
     day_of_week: int = Field(..., ge=0, le=6)
 
@@ -32,6 +46,20 @@ class ChatStatisticsResponse(BaseModel):
     response_time_ms: Optional[float]
     rag_context_found: bool
     llm_provider: Optional[str]
+    client_disconnected: bool = False
+    tokens_saved: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    user_lookup_ms: Optional[float] = None
+    history_load_ms: Optional[float] = None
+    question_detection_ms: Optional[float] = None
+    embedding_ms: Optional[float] = None
+    vector_query_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    generation_ms: Optional[float] = None
+    persistence_ms: Optional[float] = None
     created_at: datetime
     hour_of_day: int
     day_of_week: int
@@ -50,6 +78,13 @@ class ChatStatisticsSummary(BaseModel):
     average_response_time_ms: Optional[float]
     unique_users: int
     messages_with_rag_context: int
+    disconnected_messages: int = 0
+    total_tokens_saved: int = 0
+    total_input_tokens: int = 0
+    total_output_tokens: int = 0
+    total_cache_read_tokens: int = 0
+    total_cache_write_tokens: int = 0
+    prompt_cache_hit_rate: float = 0.0
     most_common_topics: List[Dict[str, Any]]
 
 
@@ -71,6 +106,15 @@ class ChatStatisticsByTopic(BaseModel):
     latest_message_date: Optional[datetime]
 
 
+class ChatStatisticsStageLatency(BaseModel):
+    """Schema para latência de um estágio do pipeline de chat"""
+    stage: str
+    samples: int
+    average_ms: Optional[float]
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+
+
 class ChatStatisticsByUser(BaseModel):
     """Schema para estatísticas por usuário (anonimizado)"""
     user_hash: str
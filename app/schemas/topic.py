@@ -0,0 +1,62 @@
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+def _validate_patterns(patterns: Optional[List[str]]) -> Optional[List[str]]:
+    for pattern in patterns or []:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Padrão regex inválido '{pattern}': {e}")
+    return patterns
+
+
+class TopicDefinitionCreate(BaseModel):
+    name: str = Field(
+        ..., min_length=1, max_length=255, description="Nome do tópico"
+    )
+    description: str = Field("", description="Descrição do tópico")
+    keywords: List[str] = Field(
+        default_factory=list,
+        description="Palavras-chave (substring, sem diferenciar maiúsculas)",
+    )
+    patterns: List[str] = Field(
+        default_factory=list, description="Padrões regex"
+    )
+    priority: int = Field(
+        1, ge=0, le=100, description="Prioridade, usada como desempate"
+    )
+
+    @field_validator('patterns')
+    @classmethod
+    def check_patterns(cls, patterns):
+        return _validate_patterns(patterns)
+
+
+class TopicDefinitionUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    description: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    patterns: Optional[List[str]] = None
+    priority: Optional[int] = Field(None, ge=0, le=100)
+
+    @field_validator('patterns')
+    @classmethod
+    def check_patterns(cls, patterns):
+        return _validate_patterns(patterns)
+
+
+class TopicDefinitionResponse(BaseModel):
+    id: int
+    name: str
+    description: str
+    keywords: List[str]
+    patterns: List[str]
+    priority: int
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
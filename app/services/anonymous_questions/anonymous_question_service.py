@@ -8,7 +8,7 @@ from app.schemas.anonymous_question import (
     AnonymousQuestionCreate, 
     AnonymousQuestionStats
 )
-from app.services.anonymous_questions.topic_classification_agent import SoftwareEngineeringTopicAgent
+from app.services.anonymous_questions.topic_catalog import get_topic_classifier
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +16,24 @@ logger = logging.getLogger(__name__)
 class AnonymousQuestionService:
     def __init__(self, db: Session):
         self.db = db
-        self.topic_agent = SoftwareEngineeringTopicAgent()
+        self.topic_agent = get_topic_classifier()
 
-    def create_question(self, question_data: AnonymousQuestionCreate) -> AnonymousQuestion:
-        """Salva uma nova dúvida anônima"""
+    def create_question(
+        self,
+        question_data: AnonymousQuestionCreate,
+        topic_detected: bool = False
+    ) -> AnonymousQuestion:
+        """
+        Salva uma nova dúvida anônima
+
+        ``topic_detected`` marca temas definidos pelo classificador; só
+        esses são reescritos pela reclassificação em lote
+        """
         try:
             db_question = AnonymousQuestion(
                 topic=question_data.topic.strip(),
-                question=question_data.question.strip()
+                question=question_data.question.strip(),
+                topic_detected=topic_detected
             )
             
             self.db.add(db_question)
@@ -129,10 +139,18 @@ class AnonymousQuestionService:
             logger.error(f"Erro ao buscar temas comuns: {e}")
             raise
 
-    def detect_and_save_question(self, message: str, context: str = "") -> Optional[AnonymousQuestion]:
+    def detect_and_save_question(
+        self,
+        message: str,
+        context: str = "",
+        topic: Optional[str] = None
+    ) -> Optional[AnonymousQuestion]:
         """
         Detecta se uma mensagem é uma dúvida e extrai o tema automaticamente usando o agente especializado
         Retorna a dúvida salva se detectada, None caso contrário
+
+        Se ``topic`` vier preenchido (o chat já classificou a mensagem), ele
+        é usado sem nova classificação
         """
         try:
             # Palavras-chave que indicam dúvidas (melhoradas)
@@ -159,7 +177,8 @@ class AnonymousQuestionService:
                 return None
             
             # Usa o agente especializado para classificar o tema
-            topic = self.topic_agent.classify_topic(message, context)
+            if topic is None:
+                topic = self.topic_agent.classify_topic(message, context)
             
             # Salva a dúvida
             question_data = AnonymousQuestionCreate(
@@ -167,7 +186,7 @@ class AnonymousQuestionService:
                 question=message
             )
             
-            return self.create_question(question_data)
+            return self.create_question(question_data, topic_detected=True)
             
         except Exception as e:
             logger.error(f"Erro ao detectar e salvar dúvida: {e}")
@@ -0,0 +1,116 @@
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.anonymous_questions.topic_classification_agent import (
+    SoftwareEngineeringTopicAgent,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingTopicClassifier:
+    """
+    Classifica pela similaridade de cosseno entre o embedding da pergunta e
+    um centróide por tópico.
+
+    Os centróides são calculados uma vez, a partir do nome, da descrição e
+    das palavras-chave de cada tópico, com o mesmo modelo usado na busca do
+    RAG. No chat o embedding da pergunta já existe, então classificar é uma
+    multiplicação de matriz por vetor, sem nova chamada ao modelo.
+
+    Sem embedding, ou abaixo de ``threshold``, usa o classificador por
+    palavras-chave. O limiar precisa ser alto: com o MiniLM, textos sem
+    relação passam com frequência de 0.3, e um centróide de termos da área
+    fica próximo de qualquer pergunta técnica. Expõe a mesma interface do
+    classificador por palavras-chave para os serviços.
+    """
+
+    def __init__(
+        self,
+        keyword_classifier: SoftwareEngineeringTopicAgent,
+        embed_documents: Callable[[List[str]], List[List[float]]],
+        threshold: float,
+    ):
+        self.keyword_classifier = keyword_classifier
+        self.threshold = threshold
+        self.topics = keyword_classifier.topics
+        self._names = [topic.name for topic in self.topics]
+        self._centroids = self._build_centroids(embed_documents)
+        logger.info(
+            f'Classificador por embeddings com {len(self._names)} centróides'
+        )
+
+    def _build_centroids(
+        self, embed_documents: Callable[[List[str]], List[List[float]]]
+    ) -> np.ndarray:
+        texts, owners = [], []
+        for index, topic in enumerate(self.topics):
+            topic_texts = [f'{topic.name}. {topic.description}']
+            topic_texts.extend(topic.keywords)
+            texts.extend(topic_texts)
+            owners.extend([index] * len(topic_texts))
+
+        embeddings = _normalize_rows(
+            np.asarray(embed_documents(texts), dtype=np.float32)
+        )
+        owners = np.asarray(owners)
+
+        centroids = np.stack([
+            embeddings[owners == index].mean(axis=0)
+            for index in range(len(self.topics))
+        ])
+        return _normalize_rows(centroids)
+
+    def classify_embedding(
+        self, embedding: Sequence[float]
+    ) -> Optional[str]:
+        """Tópico mais próximo, ou None se nenhum atingir o limiar."""
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        similarities = self._centroids @ (query / norm)
+        best = int(np.argmax(similarities))
+
+        if similarities[best] < self.threshold:
+            return None
+
+        logger.info(
+            f"Tópico por embedding: '{self._names[best]}' "
+            f'(similaridade: {similarities[best]:.3f})'
+        )
+        return self._names[best]
+
+    def classify_topic(
+        self,
+        message: str,
+        context: str = '',
+        embedding: Optional[Sequence[float]] = None,
+    ) -> str:
+        if embedding is not None:
+            topic = self.classify_embedding(embedding)
+            if topic is not None:
+                return topic
+
+        return self.keyword_classifier.classify_topic(message, context)
+
+    def get_topic_suggestions(
+        self, partial_text: str, limit: int = 5
+    ) -> List[str]:
+        return self.keyword_classifier.get_topic_suggestions(
+            partial_text, limit
+        )
+
+    def get_all_topics(self) -> List[Dict[str, str]]:
+        return self.keyword_classifier.get_all_topics()
+
+    def get_topic_details(self, topic_name: str) -> Optional[Dict]:
+        return self.keyword_classifier.get_topic_details(topic_name)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
@@ -0,0 +1,442 @@
+"""
+Reclassifica os tópicos já gravados com as definições atuais do catálogo.
+
+Quando os tópicos do catálogo (tabela ``topics``) mudam,
+``anonymous_questions.topic`` e ``chat_statistics.detected_topic`` ficam
+desatualizados. Este job lê as linhas com cursores no servidor, classifica
+os lotes em um pool de processos e grava o resultado com um UPDATE por
+lote. O progresso fica em um arquivo de checkpoint, então uma execução
+interrompida continua de onde parou.
+
+Só as dúvidas com tema definido pelo classificador (``topic_detected``)
+são reclassificadas: o tema escolhido pelo usuário ao enviar a dúvida é
+dado dele. ``--include-user-topics`` reclassifica também essas, e as
+gravadas antes de existir a coluna, que não dizem de onde veio o tema.
+
+O classificador é o mesmo do tráfego ao vivo: com
+``TOPIC_CLASSIFIER_MODE=embedding``, cada worker carrega o modelo de
+embeddings do RAG e embute os textos do lote antes de classificar. Nesse
+modo, ``--workers`` também limita quantas cópias do modelo ficam na
+memória.
+
+``chat_statistics`` guarda só o hash da mensagem; o texto vem das mensagens
+de usuário em ``chat_messages``, ligadas à estatística por ``user_id`` e
+``message_hash``. Estatísticas cujo histórico foi apagado não mudam.
+
+Uso:
+    python -m app.services.anonymous_questions.reclassification_job \\
+        [--table all] [--batch-size 1000] [--workers N] [--reset] \\
+        [--include-user-topics]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_huggingface import HuggingFaceEmbeddings
+from sqlalchemy import Integer, String, column, select, update, values
+from sqlalchemy.engine import Connection
+
+from app.config.database import SessionLocal, engine
+from app.config.settings import get_settings
+from app.models.anonymous_question import AnonymousQuestion
+from app.models.chat_history import ChatHistory
+from app.models.chat_message import ChatMessage
+from app.models.chat_statistics import ChatStatistics
+from app.services.anonymous_questions.embedding_topic_classifier import (
+    EmbeddingTopicClassifier,
+)
+from app.services.anonymous_questions.topic_catalog import (
+    TopicCatalogService,
+)
+from app.services.anonymous_questions.topic_classification_agent import (
+    SoftwareEngineeringTopicAgent,
+    TopicDefinition,
+)
+from app.services.rag.rag_service import EMBEDDING_MODEL
+
+logger = logging.getLogger(__name__)
+
+TABLES = ('anonymous_questions', 'chat_statistics')
+DEFAULT_CHECKPOINT = '.reclassification_checkpoint.json'
+
+
+@dataclass
+class _WorkerState:
+    """Classificador de cada processo do pool, montado em ``_init_worker``."""
+
+    classifier: object = None
+    embed: Optional[Callable[[List[str]], List[List[float]]]] = None
+
+
+_worker = _WorkerState()
+
+
+def _init_worker(
+    topics: List[TopicDefinition], mode: str, threshold: float
+) -> None:
+    logging.disable(logging.INFO)
+    _worker.classifier = SoftwareEngineeringTopicAgent(topics=topics)
+
+    # O modelo de embeddings só é carregado neste modo
+    if mode != 'embedding':
+        return
+
+    # Com este modelo, embed_documents e embed_query (usado no chat) geram
+    # o mesmo vetor
+    _worker.embed = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL
+    ).embed_documents
+    _worker.classifier = EmbeddingTopicClassifier(
+        _worker.classifier, embed_documents=_worker.embed, threshold=threshold
+    )
+
+
+def _classify_batch(rows: List[Tuple]) -> List[Tuple]:
+    """Classifica ``(id, chave, texto)`` e devolve ``(id, chave, tópico)``."""
+    if _worker.embed is None:
+        return [
+            (row_id, key, _worker.classifier.classify_topic(text))
+            for row_id, key, text in rows
+        ]
+
+    embeddings = _worker.embed([text for _, _, text in rows])
+    return [
+        (
+            row_id,
+            key,
+            _worker.classifier.classify_topic(text, embedding=vector),
+        )
+        for (row_id, key, text), vector in zip(rows, embeddings)
+    ]
+
+
+def topics_fingerprint(
+    agent: SoftwareEngineeringTopicAgent, mode: str, threshold: float
+) -> str:
+    """Identifica os tópicos e o classificador usados em um checkpoint."""
+    classifier = (
+        f'embedding:{threshold}' if mode == 'embedding' else 'keywords'
+    )
+    return hashlib.sha256(
+        f'{classifier}:{agent.topics!r}'.encode()
+    ).hexdigest()[:16]
+
+
+class Checkpoint:
+    """
+    Último id processado por tabela, em um arquivo JSON.
+
+    O checkpoint só vale para as mesmas definições de tópico e o mesmo
+    classificador; com outros, a reclassificação recomeça do início.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.last_ids: Dict[str, int] = {}
+
+        if path.exists():
+            data = json.loads(path.read_text())
+            if data.get('fingerprint') == fingerprint:
+                self.last_ids = data.get('last_ids', {})
+            else:
+                logger.info('Tópicos ou classificador mudaram, recomeçando')
+
+    def get(self, table: str) -> int:
+        return self.last_ids.get(table, 0)
+
+    def save(self, table: str, last_id: int) -> None:
+        self.last_ids[table] = last_id
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(
+            json.dumps(
+                {'fingerprint': self.fingerprint, 'last_ids': self.last_ids}
+            )
+        )
+        tmp.replace(self.path)
+
+
+@dataclass(frozen=True)
+class JobOptions:
+    batch_size: int = 1000
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    include_user_topics: bool = False
+
+    @property
+    def max_in_flight(self) -> int:
+        """Lotes enviados ao pool e ainda não gravados."""
+        return self.workers * 2
+
+
+@dataclass
+class JobStats:
+    table: str
+    rows: int = 0
+    updated: int = 0
+    started_at: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+
+def _stream_anonymous_questions(
+    connection: Connection,
+    after_id: int,
+    batch_size: int,
+    include_user_topics: bool,
+) -> Iterator[List[Tuple]]:
+    stmt = (
+        select(AnonymousQuestion.id, AnonymousQuestion.question)
+        .where(AnonymousQuestion.id > after_id)
+        .order_by(AnonymousQuestion.id)
+    )
+    if not include_user_topics:
+        stmt = stmt.where(AnonymousQuestion.topic_detected.is_(True))
+    result = connection.execution_options(
+        stream_results=True, yield_per=batch_size
+    ).execute(stmt)
+
+    for partition in result.partitions():
+        yield [(row.id, None, row.question) for row in partition]
+
+
+def _stream_chat_messages(
+    connection: Connection,
+    after_id: int,
+    batch_size: int,
+    include_user_topics: bool,
+) -> Iterator[List[Tuple]]:
+    # O tópico das estatísticas sempre vem do classificador, então
+    # ``include_user_topics`` não muda nada aqui
+    stmt = (
+        select(ChatMessage.id, ChatHistory.user_id, ChatMessage.content)
+        .join(ChatHistory, ChatHistory.id == ChatMessage.chat_history_id)
+        .where(ChatMessage.role == 'user', ChatMessage.id > after_id)
+        .order_by(ChatMessage.id)
+    )
+    result = connection.execution_options(
+        stream_results=True, yield_per=batch_size
+    ).execute(stmt)
+
+    for partition in result.partitions():
+        yield [
+            (
+                row.id,
+                (
+                    row.user_id,
+                    # Mesmo hash de ChatStatisticsService
+                    hashlib.sha256(row.content.encode()).hexdigest()[:16],
+                ),
+                row.content,
+            )
+            for row in partition
+        ]
+
+
+def _update_anonymous_questions(
+    connection: Connection, results: List[Tuple]
+) -> int:
+    new_topics = values(
+        column('id', Integer), column('topic', String), name='new_topics'
+    ).data([(row_id, topic) for row_id, _, topic in results])
+
+    stmt = (
+        update(AnonymousQuestion)
+        .where(
+            AnonymousQuestion.id == new_topics.c.id,
+            AnonymousQuestion.topic != new_topics.c.topic,
+        )
+        .values(topic=new_topics.c.topic)
+    )
+    return connection.execute(stmt).rowcount
+
+
+def _update_chat_statistics(
+    connection: Connection, results: List[Tuple]
+) -> int:
+    # A mesma mensagem pode aparecer várias vezes no lote
+    by_key = {key: topic for _, key, topic in results}
+    new_topics = values(
+        column('user_id', Integer),
+        column('message_hash', String),
+        column('topic', String),
+        name='new_topics',
+    ).data([
+        (user_id, message_hash, topic)
+        for (user_id, message_hash), topic in by_key.items()
+    ])
+
+    stmt = (
+        update(ChatStatistics)
+        .where(
+            ChatStatistics.user_id == new_topics.c.user_id,
+            ChatStatistics.message_hash == new_topics.c.message_hash,
+            ChatStatistics.detected_topic.is_distinct_from(new_topics.c.topic),
+        )
+        .values(detected_topic=new_topics.c.topic)
+    )
+    return connection.execute(stmt).rowcount
+
+
+_JOBS: Dict[str, Tuple[Callable, Callable]] = {
+    'anonymous_questions': (
+        _stream_anonymous_questions,
+        _update_anonymous_questions,
+    ),
+    'chat_statistics': (_stream_chat_messages, _update_chat_statistics),
+}
+
+
+def reclassify_table(
+    table: str,
+    pool: ProcessPoolExecutor,
+    checkpoint: Checkpoint,
+    options: JobOptions,
+) -> JobStats:
+    """
+    Reclassifica uma tabela. Lotes são classificados em paralelo, mas
+    gravados na ordem de leitura, para que o checkpoint só avance depois
+    que tudo antes dele foi gravado.
+    """
+    stream, write = _JOBS[table]
+    stats = JobStats(table=table, started_at=time.monotonic())
+    after_id = checkpoint.get(table)
+    logger.info(f'{table}: começando após o id {after_id}')
+
+    pending: Deque[Tuple[int, Future]] = deque()
+
+    def write_oldest(writer: Connection) -> None:
+        last_id, future = pending.popleft()
+        results = future.result()
+
+        with writer.begin():
+            stats.updated += write(writer, results)
+        checkpoint.save(table, last_id)
+
+        stats.rows += len(results)
+        logger.info(
+            f'{table}: {stats.rows} linhas, {stats.updated} atualizadas, '
+            f'{stats.rows_per_second:.0f} linhas/s (id {last_id})'
+        )
+
+    # Leitura e escrita em conexões separadas: o commit de cada lote
+    # fecharia o cursor no servidor
+    with engine.connect() as reader, engine.connect() as writer:
+        for batch in stream(
+            reader, after_id, options.batch_size, options.include_user_topics
+        ):
+            pending.append((batch[-1][0], pool.submit(_classify_batch, batch)))
+            if len(pending) >= options.max_in_flight:
+                write_oldest(writer)
+
+        while pending:
+            write_oldest(writer)
+
+    logger.info(
+        f'{table}: concluído, {stats.rows} linhas lidas, {stats.updated} '
+        f'atualizadas, {stats.rows_per_second:.0f} linhas/s'
+    )
+    return stats
+
+
+def run(
+    tables: List[str],
+    options: Optional[JobOptions] = None,
+    *,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    reset: bool = False,
+) -> List[JobStats]:
+    options = options or JobOptions()
+    path = Path(checkpoint_path)
+    if reset and path.exists():
+        path.unlink()
+
+    with SessionLocal() as db:
+        version, topics = TopicCatalogService(db).load()
+
+    settings = get_settings()
+    mode = settings.TOPIC_CLASSIFIER_MODE.lower()
+    threshold = settings.TOPIC_EMBEDDING_THRESHOLD
+    logger.info(
+        f'Usando o catálogo de tópicos na versão {version}, '
+        f'classificador {mode}'
+    )
+
+    fingerprint = topics_fingerprint(
+        SoftwareEngineeringTopicAgent(topics=topics), mode, threshold
+    )
+    # Um checkpoint sem as dúvidas do usuário não serve para uma execução
+    # com elas, que precisa passar de novo pelos ids já vistos
+    if options.include_user_topics:
+        fingerprint += '+user-topics'
+    checkpoint = Checkpoint(path, fingerprint)
+
+    # spawn: os workers não herdam as conexões abertas do processo pai
+    with ProcessPoolExecutor(
+        max_workers=options.workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(topics, mode, threshold),
+    ) as pool:
+        return [
+            reclassify_table(table, pool, checkpoint, options)
+            for table in tables
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Reclassifica os tópicos de dúvidas e estatísticas.'
+    )
+    parser.add_argument(
+        '--table', choices=[*TABLES, 'all'], default='all'
+    )
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    parser.add_argument(
+        '--reset',
+        action='store_true',
+        help='Ignora o checkpoint e recomeça do início',
+    )
+    parser.add_argument(
+        '--include-user-topics',
+        action='store_true',
+        help=(
+            'Reclassifica também as dúvidas com tema escolhido pelo usuário'
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s'
+    )
+    options = JobOptions(
+        batch_size=args.batch_size,
+        include_user_topics=args.include_user_topics,
+    )
+    if args.workers:
+        options = replace(options, workers=args.workers)
+
+    run(
+        tables=list(TABLES) if args.table == 'all' else [args.table],
+        options=options,
+        checkpoint_path=args.checkpoint,
+        reset=args.reset,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.config.settings import get_settings
+from app.models.topic import Topic, TopicCatalogVersion
+from app.schemas.topic import TopicDefinitionCreate, TopicDefinitionUpdate
+from app.services.anonymous_questions.embedding_topic_classifier import (
+    EmbeddingTopicClassifier,
+)
+from app.services.anonymous_questions.topic_classification_agent import (
+    SoftwareEngineeringTopicAgent,
+    TopicDefinition,
+    default_topic_definitions,
+)
+from app.services.rag.rag_service import get_rag_service
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_ID = 1
+
+
+class TopicCatalogService:
+    """
+    Catálogo de tópicos no banco.
+
+    Toda alteração incrementa ``topic_catalog_version`` na mesma transação,
+    com a linha da versão travada, o que também serializa edições
+    concorrentes. Os workers comparam essa versão para recarregar o
+    classificador (ver ``refresh_topic_classifier``).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def current_version(self) -> Optional[int]:
+        row = self.db.get(TopicCatalogVersion, CATALOG_VERSION_ID)
+        return row.version if row else None
+
+    def load(self) -> Tuple[int, List[TopicDefinition]]:
+        """
+        Versão e definições atuais. Na primeira carga (versão 0, a linha
+        criada pela migração), grava antes os tópicos padrão do agente; um
+        catálogo esvaziado por um admin continua vazio.
+        """
+        # A versão é lida antes dos tópicos: se uma edição entrar entre as
+        # duas leituras, a próxima verificação vê a versão nova e recarrega
+        version = self.current_version()
+        topics = self.db.query(Topic).order_by(Topic.id).all()
+
+        if not version:
+            version = self._seed_defaults()
+            topics = self.db.query(Topic).order_by(Topic.id).all()
+
+        return version, [self._to_definition(topic) for topic in topics]
+
+    def list_topics(self) -> List[Topic]:
+        return (
+            self.db.query(Topic)
+            .order_by(Topic.priority.desc(), Topic.name)
+            .all()
+        )
+
+    def create_topic(self, data: TopicDefinitionCreate) -> Topic:
+        try:
+            self._lock_version()
+            topic = Topic(**data.model_dump())
+            self.db.add(topic)
+            self._bump_version()
+            self.db.commit()
+            self.db.refresh(topic)
+
+            logger.info(f"Tópico criado: '{topic.name}'")
+            return topic
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def update_topic(
+        self, topic_id: int, data: TopicDefinitionUpdate
+    ) -> Optional[Topic]:
+        try:
+            self._lock_version()
+            topic = self.db.get(Topic, topic_id)
+            if not topic:
+                self.db.rollback()
+                return None
+
+            for field, value in data.model_dump(exclude_unset=True).items():
+                setattr(topic, field, value)
+
+            self._bump_version()
+            self.db.commit()
+            self.db.refresh(topic)
+
+            logger.info(f"Tópico atualizado: '{topic.name}'")
+            return topic
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def delete_topic(self, topic_id: int) -> bool:
+        try:
+            self._lock_version()
+            topic = self.db.get(Topic, topic_id)
+            if not topic:
+                self.db.rollback()
+                return False
+
+            self.db.delete(topic)
+            self._bump_version()
+            self.db.commit()
+
+            logger.info(f"Tópico removido: '{topic.name}'")
+            return True
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _lock_version(self) -> TopicCatalogVersion:
+        row = (
+            self.db.query(TopicCatalogVersion)
+            .filter(TopicCatalogVersion.id == CATALOG_VERSION_ID)
+            .with_for_update()
+            .first()
+        )
+        if row is None:
+            row = TopicCatalogVersion(id=CATALOG_VERSION_ID, version=0)
+            self.db.add(row)
+            self.db.flush()
+        return row
+
+    def _bump_version(self) -> None:
+        self._lock_version().version += 1
+
+    def _seed_defaults(self) -> int:
+        try:
+            version = self._lock_version()
+
+            # Outro worker pode ter populado enquanto esperávamos a trava
+            if version.version == 0:
+                if self.db.query(Topic.id).first() is None:
+                    self._add_defaults()
+                    logger.info('Catálogo de tópicos populado com os padrões')
+                version.version += 1
+
+            self.db.commit()
+            return version.version
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _add_defaults(self) -> None:
+        for definition in default_topic_definitions():
+            self.db.add(
+                Topic(
+                    name=definition.name,
+                    description=definition.description,
+                    keywords=list(definition.keywords),
+                    patterns=list(definition.patterns),
+                    priority=definition.priority,
+                )
+            )
+
+    @staticmethod
+    def _to_definition(topic: Topic) -> TopicDefinition:
+        return TopicDefinition(
+            name=topic.name,
+            description=topic.description,
+            keywords=tuple(topic.keywords),
+            patterns=tuple(topic.patterns),
+            priority=topic.priority,
+        )
+
+
+@dataclass(frozen=True)
+class _LoadedClassifier:
+    classifier: object
+    # None quando montado com os tópicos padrão, sem o banco
+    version: Optional[int]
+
+
+def _load_topic_classifier(
+    current: Optional[_LoadedClassifier], force: bool = False
+) -> Optional[_LoadedClassifier]:
+    """
+    Monta o classificador a partir do catálogo. Retorna None quando o atual
+    deve ser mantido: a versão não mudou, ou o banco ou a montagem falharam
+    e já há um classificador. Sem um atual, a falha cai nos tópicos padrão
+    (sem versão, para que a próxima verificação tente o banco de novo).
+    """
+    try:
+        with SessionLocal() as db:
+            service = TopicCatalogService(db)
+            if not force and current is not None:
+                if service.current_version() == current.version:
+                    return None
+            version, topics = service.load()
+    except Exception as e:
+        if current is not None:
+            logger.error(f'Erro ao verificar o catálogo de tópicos: {e}')
+            return None
+        logger.error(
+            'Erro ao carregar o catálogo de tópicos, '
+            f'usando os padrão: {e}'
+        )
+        version, topics = None, None
+
+    try:
+        classifier = _build_topic_classifier(topics)
+    except Exception as e:
+        # Ex.: um padrão inválido gravado direto no banco
+        if current is not None:
+            logger.error(f'Erro ao montar o classificador de tópicos: {e}')
+            return None
+        logger.error(
+            'Erro ao montar o classificador de tópicos, '
+            f'usando os padrão: {e}'
+        )
+        version = None
+        classifier = _build_topic_classifier(None)
+
+    logger.info(f'Classificador de tópicos carregado (versão {version})')
+    return _LoadedClassifier(classifier, version)
+
+
+_classifier: ProcessSingleton[_LoadedClassifier] = ProcessSingleton(
+    lambda: _load_topic_classifier(None, force=True)
+)
+_refresh_lock = threading.Lock()
+
+
+def get_topic_classifier():
+    """
+    Retorna o classificador de tópicos compartilhado pelo processo: o de
+    palavras-chave ou, com ``TOPIC_CLASSIFIER_MODE=embedding``, o
+    EmbeddingTopicClassifier, que usa o modelo de embeddings do RAG.
+
+    Quem precisa classificar várias mensagens de forma consistente deve
+    guardar a instância retornada: uma recarga troca a referência
+    compartilhada, nunca altera um classificador já entregue.
+    """
+    return _classifier.get().classifier
+
+
+def refresh_topic_classifier(force: bool = False) -> bool:
+    """
+    Recarrega o classificador se a versão do catálogo mudou.
+
+    O novo classificador é montado por completo antes da troca, que é uma
+    única atribuição: requisições em andamento seguem com o anterior. Se o
+    banco ou a montagem falharem, mantém o classificador atual.
+
+    Returns:
+        True se o classificador foi trocado
+    """
+    with _refresh_lock:
+        loaded = _load_topic_classifier(_classifier.peek(), force)
+        if loaded is None:
+            return False
+        _classifier.set(loaded)
+
+    return True
+
+
+def _build_topic_classifier(topics: Optional[List[TopicDefinition]]):
+    settings = get_settings()
+    keyword_classifier = SoftwareEngineeringTopicAgent(
+        cache_size=settings.TOPIC_CLASSIFICATION_CACHE_SIZE,
+        topics=topics,
+    )
+
+    if settings.TOPIC_CLASSIFIER_MODE.lower() != 'embedding':
+        return keyword_classifier
+
+    # Só o modo por embeddings carrega o modelo do RAG
+    try:
+        return EmbeddingTopicClassifier(
+            keyword_classifier,
+            embed_documents=get_rag_service().embedding_function.embed_documents,
+            threshold=settings.TOPIC_EMBEDDING_THRESHOLD,
+        )
+    except Exception as e:
+        logger.error(
+            "Erro ao criar o classificador por embeddings, "
+            f"usando palavras-chave: {e}"
+        )
+        return keyword_classifier
+
+
+class TopicCatalogWatcher:
+    """Verifica periodicamente a versão do catálogo e recarrega se mudou."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await run_in_threadpool(refresh_topic_classifier)
+            except Exception as e:
+                logger.error(f'Erro ao recarregar os tópicos: {e}')
+
+
+_watcher: ProcessSingleton[TopicCatalogWatcher] = ProcessSingleton(
+    lambda: TopicCatalogWatcher(get_settings().TOPIC_CATALOG_POLL_SECONDS)
+)
+
+
+def get_topic_catalog_watcher() -> TopicCatalogWatcher:
+    return _watcher.get()
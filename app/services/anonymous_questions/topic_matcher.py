@@ -0,0 +1,286 @@
+import re
+from array import array
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+_QUANTIFIERS = '*+?{'
+
+
+class KeywordAutomaton:
+    """
+    Autômato de Aho-Corasick para encontrar, em uma única passada pelo
+    texto, quais de um conjunto de palavras aparecem nele como substring.
+
+    As transições são completadas na construção (um DFA), então cada
+    caractere custa uma busca em dicionário, sem seguir links de falha.
+    """
+
+    def __init__(self, words: Sequence[str]):
+        self.words = list(words)
+        self._always: Set[int] = {
+            index for index, word in enumerate(self.words) if not word
+        }
+
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[int]] = [set()]
+
+        for index, word in enumerate(self.words):
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(index)
+
+        # Busca em largura: cada estado herda as transições e as saídas do
+        # seu link de falha, que já foi completado antes dele
+        transitions: List[Dict[str, int]] = [dict(goto[0])]
+        transitions.extend({} for _ in range(len(goto) - 1))
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+
+        for state in queue:
+            transitions[state] = dict(transitions[fail[state]])
+            transitions[state].update(goto[state])
+            outputs[state] |= outputs[fail[state]]
+
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0)
+                queue.append(child)
+
+        self._transitions = transitions
+        self._outputs = [frozenset(output) for output in outputs]
+
+    def find(self, text: str) -> Set[int]:
+        """Retorna os índices das palavras que ocorrem em ``text``."""
+        found = set(self._always)
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+
+        return found
+
+
+def required_literal(pattern: str) -> str:
+    """
+    Maior trecho literal que toda ocorrência de ``pattern`` contém.
+
+    A análise é conservadora: grupos, classes, escapes de classe e átomos
+    com quantificador interrompem o trecho, e uma alternância no nível
+    superior faz retornar ``''`` (nenhum literal garantido).
+    """
+    best = ''
+    run: List[str] = []
+    last_was_literal = False
+    i = 0
+
+    def flush() -> None:
+        nonlocal best
+        if len(run) > len(best):
+            best = ''.join(run)
+        run.clear()
+
+    while i < len(pattern):
+        char = pattern[i]
+
+        if char in _QUANTIFIERS:
+            if last_was_literal:
+                run.pop()
+            flush()
+            last_was_literal = False
+            i += 1
+            continue
+
+        literal, i = _read_atom(pattern, i)
+        if i < 0:
+            return ''
+
+        if literal is None:
+            flush()
+            last_was_literal = False
+        else:
+            run.append(literal)
+            last_was_literal = True
+
+    flush()
+    return best
+
+
+def _read_atom(pattern: str, start: int) -> Tuple[Optional[str], int]:
+    """
+    Lê o átomo que começa em ``start``: retorna o caractere literal que ele
+    representa (``None`` se não for literal) e o índice seguinte, ou ``-1``
+    quando o padrão não tem literal garantido.
+    """
+    char = pattern[start]
+
+    if char == '\\':
+        escaped = pattern[start + 1 : start + 2]
+        literal = escaped if escaped and not escaped.isalnum() else None
+        return literal, start + 2
+    if char == '[':
+        return None, _skip_class(pattern, start)
+    if char == '(':
+        return None, _skip_group(pattern, start)
+    if char in '|)':
+        return None, -1
+    if char in '.^$':
+        return None, start + 1
+    return char, start + 1
+
+
+def _skip_class(pattern: str, start: int) -> int:
+    """Índice logo após a classe ``[...]`` que começa em ``start``."""
+    i = start + 1
+    if pattern[i : i + 1] == '^':
+        i += 1
+    if pattern[i : i + 1] == ']':
+        i += 1
+
+    while i < len(pattern) and pattern[i] != ']':
+        i += 2 if pattern[i] == '\\' else 1
+
+    return i + 1
+
+
+def _skip_group(pattern: str, start: int) -> int:
+    """Índice logo após o grupo que começa em ``start``, ou -1."""
+    depth = 0
+    i = start
+
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            i = _skip_class(pattern, i)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+
+    return -1
+
+
+def _all_characters() -> str:
+    codepoints = array('I', range(0xD800)).tobytes()
+    codepoints += array('I', range(0xE000, 0x110000)).tobytes()
+    return codepoints.decode('utf-32-le')
+
+
+class CompiledTopicMatcher:
+    """
+    Definições de tópico compiladas para pontuar um texto em uma passada.
+
+    Palavras-chave e um literal obrigatório de cada padrão regex vão para o
+    mesmo autômato de Aho-Corasick. Uma única varredura do texto diz quais
+    palavras-chave ocorrem e quais padrões podem casar; só estes rodam a
+    regex (pré-compilada). A pontuação é a mesma da implementação
+    original: 10 por padrão, 1 por palavra-chave e ``prioridade * 0.1``
+    para os tópicos com pontuação positiva.
+
+    O texto deve chegar em minúsculas, como em ``classify_topic``.
+    """
+
+    def __init__(self, topics: Sequence):
+        words: Dict[str, int] = {}
+
+        def word_id(word: str) -> int:
+            return words.setdefault(word, len(words))
+
+        self._topics = []
+        literal_chars: Set[str] = set()
+
+        for topic in topics:
+            keyword_ids = [
+                word_id(keyword.lower()) for keyword in topic.keywords
+            ]
+
+            patterns = []
+            for pattern in topic.patterns:
+                compiled = re.compile(pattern, re.IGNORECASE)
+                literal = self._literal_for(compiled)
+                literal_chars.update(literal)
+                patterns.append(
+                    (compiled, word_id(literal) if literal else None)
+                )
+
+            self._topics.append(
+                (topic.name, topic.priority, keyword_ids, patterns)
+            )
+
+        self._automaton = KeywordAutomaton(list(words))
+        self._unsafe = self._unsafe_characters(literal_chars)
+
+    @staticmethod
+    def _literal_for(compiled: re.Pattern) -> str:
+        if compiled.flags & re.VERBOSE:
+            return ''
+
+        literal = required_literal(compiled.pattern)
+        if any(len(char.lower()) != 1 for char in literal):
+            return ''
+        return literal.lower()
+
+    @staticmethod
+    def _unsafe_characters(literal_chars: Set[str]) -> Optional[re.Pattern]:
+        """
+        Caracteres que, com IGNORECASE, casam com algum caractere dos
+        literais sem ser ele mesmo (como 'ſ' e 's'). Se o texto tiver algum,
+        o pré-filtro é ignorado e todos os padrões rodam.
+        """
+        if not literal_chars:
+            return None
+
+        ignorecase = re.compile(
+            '[' + ''.join(re.escape(char) for char in literal_chars) + ']',
+            re.IGNORECASE,
+        )
+        unsafe = set(ignorecase.findall(_all_characters())) - literal_chars
+        if not unsafe:
+            return None
+
+        return re.compile(
+            '[' + ''.join(re.escape(char) for char in sorted(unsafe)) + ']'
+        )
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Pontuação de cada tópico com pelo menos uma ocorrência."""
+        found = self._automaton.find(text)
+        prefilter = self._unsafe is None or not self._unsafe.search(text)
+        scores = {}
+
+        for name, priority, keyword_ids, patterns in self._topics:
+            score = 0
+
+            for compiled, literal_id in patterns:
+                if prefilter and literal_id is not None:
+                    if literal_id not in found:
+                        continue
+                if compiled.search(text):
+                    score += 10
+
+            for keyword_id in keyword_ids:
+                if keyword_id in found:
+                    score += 1
+
+            if score > 0:
+                score += priority * 0.1
+                scores[name] = score
+
+        return scores
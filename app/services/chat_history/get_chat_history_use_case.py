@@ -1,5 +1,5 @@
 from typing import List, Optional, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.config.database import commit, get_by_attribute
 from app.models.chat_history import ChatHistory
@@ -14,7 +14,12 @@ class GetChatHistoryUseCase:
         if error or not user:
             return None, Error(error_code=404, error_message="Usuário não encontrado")
         try:
-            chat_histories = db.query(ChatHistory).filter(ChatHistory.user_id == user.id).all()
+            chat_histories = (
+                db.query(ChatHistory)
+                .options(selectinload(ChatHistory.messages))
+                .filter(ChatHistory.user_id == user.id)
+                .all()
+            )
             return chat_histories, None
         except Exception as e:
             return None, Error(error_code=500, error_message=str(e))
@@ -1,7 +1,11 @@
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models.chat_history import ChatHistory
+from app.models.chat_message import ChatMessage
 from app.schemas.chat_history import ChatHistoryCreate, ChatHistoryUpdate
 
 
@@ -79,6 +83,84 @@ class ChatHistoryService:
         self.db.refresh(db_chat_history)
         return db_chat_history
 
+    def get_messages(
+        self, chat_history_id: int, limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Busca as mensagens de uma conversa em ordem cronológica.
+
+        Args:
+            chat_history_id: ID do histórico
+            limit: Se informado, retorna apenas as últimas ``limit`` mensagens
+
+        Returns:
+            Lista de mensagens no formato {'role', 'content'}
+        """
+        query = self.db.query(ChatMessage.role, ChatMessage.content).filter(
+            ChatMessage.chat_history_id == chat_history_id
+        )
+
+        if limit is None:
+            rows = query.order_by(ChatMessage.seq).all()
+        else:
+            rows = query.order_by(ChatMessage.seq.desc()).limit(limit).all()
+            rows.reverse()
+
+        return [{'role': role, 'content': content} for role, content in rows]
+
+    def append_messages(
+        self, messages_by_history: Dict[int, List[Dict[str, str]]]
+    ) -> None:
+        """
+        Acrescenta mensagens ao fim de uma ou mais conversas, sem reescrever
+        as que já estão gravadas. Não faz commit; o chamador controla a
+        transação.
+
+        Args:
+            messages_by_history: Novas mensagens de cada histórico, em ordem
+        """
+        history_ids = [
+            history_id
+            for history_id, messages in messages_by_history.items()
+            if messages
+        ]
+        if not history_ids:
+            return
+
+        # Trava as conversas antes de ler o último seq: writers de outros
+        # processos podem anexar à mesma conversa ao mesmo tempo. A ordem
+        # por id evita deadlock entre lotes com as mesmas conversas.
+        self.db.query(ChatHistory.id).filter(
+            ChatHistory.id.in_(history_ids)
+        ).order_by(ChatHistory.id).with_for_update().all()
+
+        next_seq = dict(
+            self.db.query(
+                ChatMessage.chat_history_id, func.max(ChatMessage.seq) + 1
+            )
+            .filter(ChatMessage.chat_history_id.in_(history_ids))
+            .group_by(ChatMessage.chat_history_id)
+            .all()
+        )
+
+        now = datetime.utcnow()
+        rows = []
+        for history_id in history_ids:
+            start = next_seq.get(history_id, 0)
+            for offset, message in enumerate(messages_by_history[history_id]):
+                rows.append({
+                    'chat_history_id': history_id,
+                    'seq': start + offset,
+                    'role': message['role'],
+                    'content': message['content'],
+                    'created_at': now,
+                })
+
+        self.db.bulk_insert_mappings(ChatMessage, rows)
+        self.db.query(ChatHistory).filter(
+            ChatHistory.id.in_(history_ids)
+        ).update({'updated_at': now}, synchronize_session=False)
+
     def delete_chat_history(self, chat_history_id: int) -> bool:
         """
         Remove um registro do histórico de chat.
@@ -0,0 +1,225 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.config.settings import get_settings
+from app.services.chat_history.service import ChatHistoryService
+from app.services.chat_statistics.chat_statistics_service import (
+    ChatStatisticsService,
+)
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatTurnRecord:
+    """Um turno de chat finalizado, pronto para ser persistido."""
+
+    history_id: int
+    # Somente as mensagens novas deste turno (pergunta e resposta)
+    new_messages: list
+    # Argumentos de ChatStatisticsService.build_message_statistic
+    statistic: Dict = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+_STOP = object()
+
+
+class ChatTurnWriter:
+    """
+    Grava turnos de chat em segundo plano, em lote.
+
+    O stream SSE apenas enfileira o turno e termina; uma thread dedicada
+    agrupa até ``batch_size`` turnos (ou o que chegar em
+    ``flush_interval`` segundos) e grava mensagens e estatísticas em uma
+    única transação. No encerramento, ``stop`` esvazia a fila antes de
+    retornar, então nenhum turno aceito é perdido.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._accepting = False
+        self.dropped_turns = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._accepting = True
+        self._thread = threading.Thread(
+            target=self._run, name='chat-turn-writer', daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, record: ChatTurnRecord) -> bool:
+        """
+        Enfileira um turno sem bloquear. Retorna False se o writer estiver
+        parado ou com a fila cheia; nesse caso o chamador grava o turno
+        diretamente com ``write_batch``.
+        """
+        if not self._accepting:
+            return False
+
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            logger.warning('Fila de persistência de chat cheia')
+            return False
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Para de aceitar turnos e grava tudo o que ainda está na fila."""
+        if self._thread is None:
+            return
+
+        self._accepting = False
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+        if self._thread.is_alive():
+            logger.error(
+                'Writer de chat não terminou a tempo; '
+                f'{self._queue.qsize()} turnos pendentes'
+            )
+        self._thread = None
+
+    def write_batch(self, records: List[ChatTurnRecord]) -> None:
+        """Grava um lote de turnos em uma única transação."""
+        if not records:
+            return
+
+        # Vários turnos da mesma conversa no lote são anexados em ordem
+        new_messages = {}
+        for record in records:
+            new_messages.setdefault(record.history_id, []).extend(
+                record.new_messages
+            )
+
+        with self.session_factory() as db:
+            try:
+                ChatHistoryService(db).append_messages(new_messages)
+                written_at = time.monotonic()
+
+                stats_service = ChatStatisticsService(db)
+                for record in records:
+                    if not record.statistic:
+                        continue
+                    statistic = stats_service.build_message_statistic(
+                        **record.statistic
+                    )
+                    # Do fim do stream até as mensagens estarem escritas,
+                    # incluindo a espera na fila
+                    statistic.persistence_ms = (
+                        written_at - record.submitted_at
+                    ) * 1000
+                    db.add(statistic)
+
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(
+                    f'Erro ao gravar lote de {len(records)} turnos: {e}'
+                )
+                raise
+
+    def _run(self) -> None:
+        stopping = False
+
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Esvazia a fila inteira, gravando a cada batch_size turnos
+            batch = []
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+                if len(batch) >= self.batch_size:
+                    self._write_with_fallback(batch)
+                    batch = []
+
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            self._write_with_fallback(batch)
+
+    def _write_with_fallback(self, batch: List[ChatTurnRecord]) -> None:
+        if not batch:
+            return
+
+        try:
+            self.write_batch(batch)
+        except Exception:
+            if len(batch) == 1:
+                self._drop(batch[0])
+                return
+
+            # Isola o turno com problema para não perder o lote inteiro
+            for record in batch:
+                try:
+                    self.write_batch([record])
+                except Exception:
+                    self._drop(record)
+
+    def _drop(self, record: ChatTurnRecord) -> None:
+        """Registra um turno que não pôde ser gravado nem isoladamente."""
+        self.dropped_turns += 1
+        logger.exception(
+            f'Turno do chat descartado (histórico {record.history_id}, '
+            f'{self.dropped_turns} descartados até agora)'
+        )
+
+
+def _start_chat_turn_writer() -> ChatTurnWriter:
+    settings = get_settings()
+    writer = ChatTurnWriter(
+        session_factory=SessionLocal,
+        batch_size=settings.CHAT_WRITER_BATCH_SIZE,
+        flush_interval=settings.CHAT_WRITER_FLUSH_INTERVAL_SECONDS,
+        max_queue=settings.CHAT_WRITER_MAX_QUEUE,
+    )
+    writer.start()
+    return writer
+
+
+_writer: ProcessSingleton[ChatTurnWriter] = ProcessSingleton(
+    _start_chat_turn_writer
+)
+
+
+def get_chat_turn_writer() -> ChatTurnWriter:
+    """Retorna o writer de turnos do processo, iniciando-o se necessário."""
+    return _writer.get()
+
+
+def stop_chat_turn_writer() -> None:
+    writer = _writer.reset()
+    if writer is not None:
+        writer.stop(
+            timeout=get_settings().CHAT_WRITER_SHUTDOWN_TIMEOUT_SECONDS
+        )
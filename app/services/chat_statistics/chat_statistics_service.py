@@ -1,5 +1,6 @@
 import logging
 import hashlib
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
@@ -12,66 +13,81 @@ from app.schemas.chat_statistics import (
     ChatStatisticsByTime,
     ChatStatisticsByTopic,
     ChatStatisticsByUser,
+    ChatStatisticsStageLatency,
     ChatStatisticsFilters,
     ChatStatisticsDashboard
 )
-from app.services.anonymous_questions.topic_classification_agent import SoftwareEngineeringTopicAgent
+from app.services.anonymous_questions.topic_catalog import get_topic_classifier
 from app.utils.timezone import now_brazil, get_brazil_hour_and_day
 
 logger = logging.getLogger(__name__)
 
+# Estágios do pipeline de chat, na ordem em que acontecem
+LATENCY_STAGES = [
+    'user_lookup_ms',
+    'history_load_ms',
+    'question_detection_ms',
+    'embedding_ms',
+    'vector_query_ms',
+    'ttft_ms',
+    'generation_ms',
+    'persistence_ms',
+]
+
+
+@dataclass
+class MessageMetrics:
+    """
+    Medições de um turno do chat, gravadas junto com a estatística da
+    mensagem. ``stage_ms`` é o ``StageTimer.durations`` do turno, indexado
+    pelos nomes de ``LATENCY_STAGES``.
+    """
+
+    response_time_ms: Optional[float] = None
+    rag_context_found: bool = False
+    llm_provider: Optional[str] = None
+    client_disconnected: bool = False
+    tokens_saved: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    stage_ms: Dict[str, float] = field(default_factory=dict)
+
+
+def _round_ms(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
 
 class ChatStatisticsService:
     def __init__(self, db: Session):
         self.db = db
-        self.topic_agent = SoftwareEngineeringTopicAgent()
+        self.topic_agent = get_topic_classifier()
 
     def create_message_statistic(
         self, 
         message: str, 
         user_id: Optional[int] = None,
         user_email: Optional[str] = None,
-        response_time_ms: Optional[float] = None,
-        rag_context_found: bool = False,
-        llm_provider: Optional[str] = None
+        metrics: Optional[MessageMetrics] = None,
     ) -> ChatStatistics:
         """Cria uma nova estatística para uma mensagem enviada"""
         try:
-            # Gera hashes para privacidade
-            message_hash = hashlib.sha256(message.encode()).hexdigest()[:16]
-            user_email_hash = None
-            if user_email:
-                user_email_hash = hashlib.sha256(user_email.encode()).hexdigest()[:16]
-            
-            # Classifica a mensagem
-            detected_topic = self.topic_agent.classify_topic(message)
-            is_question = self._is_question(message)
-            message_type = self._classify_message_type(message)
-            
-            # Informações temporais (UTC-3 - Horário de Brasília)
-            hour_of_day, day_of_week = get_brazil_hour_and_day()
-            
-            # Cria a estatística
-            statistic = ChatStatistics(
+            statistic = self.build_message_statistic(
+                message=message,
                 user_id=user_id,
-                user_email_hash=user_email_hash,
-                message_length=len(message),
-                message_hash=message_hash,
-                detected_topic=detected_topic,
-                is_question=is_question,
-                message_type=message_type,
-                response_time_ms=response_time_ms,
-                rag_context_found=rag_context_found,
-                llm_provider=llm_provider,
-                hour_of_day=hour_of_day,
-                day_of_week=day_of_week
+                user_email=user_email,
+                metrics=metrics,
             )
             
             self.db.add(statistic)
             self.db.commit()
             self.db.refresh(statistic)
             
-            logger.info(f"Estatística criada: tipo={message_type}, tópico={detected_topic}")
+            logger.info(
+                f"Estatística criada: tipo={statistic.message_type}, "
+                f"tópico={statistic.detected_topic}"
+            )
             return statistic
             
         except Exception as e:
@@ -79,6 +95,65 @@ class ChatStatisticsService:
             self.db.rollback()
             raise
 
+    def build_message_statistic(
+        self,
+        message: str,
+        user_id: Optional[int] = None,
+        user_email: Optional[str] = None,
+        *,
+        metrics: Optional[MessageMetrics] = None,
+        detected_topic: Optional[str] = None
+    ) -> ChatStatistics:
+        """
+        Monta a estatística de uma mensagem sem gravá-la, para que possa ser
+        inserida em lote junto com outras. ``detected_topic`` evita
+        classificar de novo uma mensagem que o chat já classificou
+        """
+        if metrics is None:
+            metrics = MessageMetrics()
+
+        # Gera hashes para privacidade
+        message_hash = hashlib.sha256(message.encode()).hexdigest()[:16]
+        user_email_hash = None
+        if user_email:
+            user_email_hash = hashlib.sha256(
+                user_email.encode()
+            ).hexdigest()[:16]
+
+        # Classifica a mensagem
+        if detected_topic is None:
+            detected_topic = self.topic_agent.classify_topic(message)
+        is_question = self._is_question(message)
+        message_type = self._classify_message_type(message)
+
+        # Informações temporais (UTC-3 - Horário de Brasília)
+        hour_of_day, day_of_week = get_brazil_hour_and_day()
+
+        return ChatStatistics(
+            user_id=user_id,
+            user_email_hash=user_email_hash,
+            message_length=len(message),
+            message_hash=message_hash,
+            detected_topic=detected_topic,
+            is_question=is_question,
+            message_type=message_type,
+            response_time_ms=metrics.response_time_ms,
+            rag_context_found=metrics.rag_context_found,
+            llm_provider=metrics.llm_provider,
+            client_disconnected=metrics.client_disconnected,
+            tokens_saved=metrics.tokens_saved,
+            input_tokens=metrics.input_tokens,
+            output_tokens=metrics.output_tokens,
+            cache_read_tokens=metrics.cache_read_tokens,
+            cache_write_tokens=metrics.cache_write_tokens,
+            **{
+                stage: metrics.stage_ms.get(stage)
+                for stage in LATENCY_STAGES
+            },
+            hour_of_day=hour_of_day,
+            day_of_week=day_of_week
+        )
+
     def get_summary_statistics(self, filters: Optional[ChatStatisticsFilters] = None) -> ChatStatisticsSummary:
         """Retorna resumo geral das estatísticas"""
         try:
@@ -108,6 +183,14 @@ class ChatStatisticsService:
             # Mensagens com contexto RAG
             messages_with_rag = query.filter(ChatStatistics.rag_context_found == True).count()
             
+            # Respostas interrompidas pelo cliente
+            disconnected_messages = query.filter(
+                ChatStatistics.client_disconnected.is_(True)
+            ).count()
+            total_tokens_saved = query.with_entities(
+                func.sum(ChatStatistics.tokens_saved)
+            ).scalar() or 0
+
             # Tópicos mais comuns
             common_topics = query.filter(ChatStatistics.detected_topic != None).with_entities(
                 ChatStatistics.detected_topic,
@@ -127,6 +210,9 @@ class ChatStatisticsService:
                 average_response_time_ms=round(avg_response_time, 2) if avg_response_time else None,
                 unique_users=unique_users,
                 messages_with_rag_context=messages_with_rag,
+                disconnected_messages=disconnected_messages,
+                total_tokens_saved=total_tokens_saved,
+                **self._token_usage_summary(query),
                 most_common_topics=most_common_topics
             )
             
@@ -134,6 +220,34 @@ class ChatStatisticsService:
             logger.error(f"Erro ao buscar estatísticas resumo: {e}")
             raise
 
+    @staticmethod
+    def _token_usage_summary(query) -> Dict[str, Any]:
+        """Uso de tokens e aproveitamento do cache de prompt"""
+        (
+            input_tokens,
+            output_tokens,
+            cache_read_tokens,
+            cache_write_tokens,
+        ) = query.with_entities(
+            func.coalesce(func.sum(ChatStatistics.input_tokens), 0),
+            func.coalesce(func.sum(ChatStatistics.output_tokens), 0),
+            func.coalesce(func.sum(ChatStatistics.cache_read_tokens), 0),
+            func.coalesce(func.sum(ChatStatistics.cache_write_tokens), 0),
+        ).one()
+        prompt_tokens = input_tokens + cache_read_tokens + cache_write_tokens
+
+        return {
+            'total_input_tokens': input_tokens,
+            'total_output_tokens': output_tokens,
+            'total_cache_read_tokens': cache_read_tokens,
+            'total_cache_write_tokens': cache_write_tokens,
+            'prompt_cache_hit_rate': (
+                round(cache_read_tokens / prompt_tokens, 4)
+                if prompt_tokens
+                else 0.0
+            ),
+        }
+
     def get_statistics_by_time(self, filters: Optional[ChatStatisticsFilters] = None) -> Dict[str, List[ChatStatisticsByTime]]:
         """Retorna estatísticas agrupadas por tempo"""
         try:
@@ -216,6 +330,48 @@ class ChatStatisticsService:
             logger.error(f"Erro ao buscar estatísticas por tópico: {e}")
             raise
 
+    def get_latency_breakdown(
+        self, filters: Optional[ChatStatisticsFilters] = None
+    ) -> List[ChatStatisticsStageLatency]:
+        """Retorna média, p50 e p95 de cada estágio do pipeline de chat"""
+        try:
+            query = self.db.query(ChatStatistics)
+
+            if filters:
+                query = self._apply_filters(query, filters)
+
+            # Uma única consulta com as agregações de todos os estágios
+            columns = []
+            for stage in LATENCY_STAGES:
+                column = getattr(ChatStatistics, stage)
+                columns.extend([
+                    func.count(column),
+                    func.avg(column),
+                    func.percentile_cont(0.5).within_group(column),
+                    func.percentile_cont(0.95).within_group(column),
+                ])
+
+            row = query.with_entities(*columns).one()
+
+            breakdown = []
+            for index, stage in enumerate(LATENCY_STAGES):
+                samples, avg_ms, p50_ms, p95_ms = row[index * 4:index * 4 + 4]
+                breakdown.append(
+                    ChatStatisticsStageLatency(
+                        stage=stage.removesuffix('_ms'),
+                        samples=samples or 0,
+                        average_ms=_round_ms(avg_ms),
+                        p50_ms=_round_ms(p50_ms),
+                        p95_ms=_round_ms(p95_ms),
+                    )
+                )
+
+            return breakdown
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar latência por estágio: {e}")
+            raise
+
     def get_dashboard_data(self, filters: Optional[ChatStatisticsFilters] = None) -> ChatStatisticsDashboard:
         """Retorna dados completos para dashboard"""
         try:
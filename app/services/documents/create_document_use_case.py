@@ -2,18 +2,19 @@ import io
 import logging
 import os
 import tempfile
-import chromadb
+from typing import Optional
 
 from fastapi import File, HTTPException, UploadFile, status
 from googleapiclient.http import MediaIoBaseUpload
 from sqlalchemy.orm import Session
 
 from app.config.database import commit, create, get_by_attribute
-from app.config.settings import Settings
+from app.config.settings import get_settings
 from app.models.document import Document
 from app.models.user import User
 from app.schemas.error import Error
-from app.services.rag.rag_service import RagService
+from app.services.llm.semantic_cache import invalidate_answer_cache
+from app.services.rag.rag_service import RagService, get_rag_service
 from app.utils.google_drive import authenticate_google_drive
 
 logger = logging.getLogger(__name__)
@@ -45,7 +46,7 @@ def get_or_create_folder(drive_service, folder_name):
 
     permission = {
         'type': 'domain',
-        'domain': Settings().GOOGLE_DOMAIN,
+        'domain': get_settings().GOOGLE_DOMAIN,
         'role': 'reader',
         'allowFileDiscovery': True,
     }
@@ -65,6 +66,7 @@ class CreateDocumentUseCase:
         db: Session,
         user_email: str,
         file: UploadFile = File(...),
+        rag_service: Optional[RagService] = None,
     ):
         logger.info(f"Starting document creation process for file: {file.filename}")
         contents = file.file.read()
@@ -77,7 +79,7 @@ class CreateDocumentUseCase:
             'name': file.filename,
             'parents': [
                 get_or_create_folder(
-                    drive_service, Settings().GOOGLE_FOLDER_NAME
+                    drive_service, get_settings().GOOGLE_FOLDER_NAME
                 )
             ],
         }
@@ -115,7 +117,7 @@ class CreateDocumentUseCase:
             permission = {
                 'type': 'domain',
                 'role': 'reader',
-                'domain': Settings().GOOGLE_DOMAIN,
+                'domain': get_settings().GOOGLE_DOMAIN,
                 'allowFileDiscovery': True,
             }
 
@@ -137,8 +139,8 @@ class CreateDocumentUseCase:
                 f'File {file.filename} uploaded with id {file_id}, link {share_link["webViewLink"]}'
             )
 
-            logger.info("Initializing RagService to process the document...")
-            rag_service = RagService()
+            logger.info("Processing the document with RagService...")
+            rag_service = rag_service or get_rag_service()
             rag_service.process_document(
                 file_path=tmp_file_path, 
                 original_filename=file.filename,
@@ -146,6 +148,7 @@ class CreateDocumentUseCase:
                 g_file_id=file_id
             )
             logger.info("Document processed by RagService.")
+            invalidate_answer_cache()
 
         except Exception as e:
             logger.error(f'Erro ao criar documento: {str(e)}', exc_info=True)
@@ -155,9 +158,6 @@ class CreateDocumentUseCase:
                 logger.info(f"Removing temporary file: {tmp_file_path}")
                 os.remove(tmp_file_path)
                 logger.info("Temporary file removed.")
-            
-            logger.info("Clearing ChromaDB client cache post-document-upload.")
-            chromadb.api.client.SharedSystemClient.clear_system_cache()
 
         logger.info(f"Fetching user with email: {user_email}")
         user, error = get_by_attribute(db, User, 'email', user_email)
@@ -5,10 +5,11 @@ from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.config.database import commit
-from app.config.settings import Settings
+from app.config.settings import get_settings
 from app.models.document import Document
 from app.schemas.error import Error
-from app.services.rag.rag_service import RagService
+from app.services.llm.semantic_cache import invalidate_answer_cache
+from app.services.rag.rag_service import RagService, get_rag_service
 from app.utils.google_drive import authenticate_google_drive
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,9 @@ logger = logging.getLogger(__name__)
 class DeleteAllDocumentsUseCase:
     @staticmethod
     @commit
-    def execute(db: Session) -> Tuple[Optional[Dict], Optional[Error]]:
+    def execute(
+        db: Session, rag_service: Optional[RagService] = None
+    ) -> Tuple[Optional[Dict], Optional[Error]]:
         """
         Deleta todos os documentos do sistema de forma independente:
         - Google Drive: todos os arquivos da pasta configurada
@@ -26,6 +29,7 @@ class DeleteAllDocumentsUseCase:
         
         Args:
             db: Sessão do banco de dados
+            rag_service: Instância compartilhada do RagService (opcional)
             
         Returns:
             Tuple contendo relatório de deleção e erro (se houver)
@@ -46,7 +50,7 @@ class DeleteAllDocumentsUseCase:
                 logger.info("Serviço Google Drive autenticado com sucesso")
                 
                 # Buscar a pasta configurada
-                folder_name = Settings().GOOGLE_FOLDER_NAME
+                folder_name = get_settings().GOOGLE_FOLDER_NAME
                 logger.info(f"Buscando pasta: {folder_name}")
                 
                 # Query para encontrar a pasta
@@ -99,8 +103,7 @@ class DeleteAllDocumentsUseCase:
             # 2. DELETAR TODOS OS DOCUMENTOS DO CHROMADB
             logger.info("=== INICIANDO DELEÇÃO NO CHROMADB ===")
             try:
-                rag_service = RagService()
-                logger.info("RagService inicializado com sucesso")
+                rag_service = rag_service or get_rag_service()
                 
                 # Obter informações antes da deleção
                 collection_info = rag_service.get_collection_info()
@@ -109,6 +112,7 @@ class DeleteAllDocumentsUseCase:
                 
                 # Deletar todos os documentos
                 result = rag_service.delete_all_documents()
+                invalidate_answer_cache()
                 
                 if "error" in result:
                     deletion_report["chromadb"]["errors"].append(result["error"])
@@ -162,7 +166,7 @@ class DeleteAllDocumentsUseCase:
                 "total_errors": total_errors,
                 "success": total_errors == 0,
                 "systems_processed": 3,
-                "folder_used": Settings().GOOGLE_FOLDER_NAME
+                "folder_used": get_settings().GOOGLE_FOLDER_NAME
             }
             
             logger.warning(f"DELEÇÃO INDEPENDENTE FINALIZADA - Total deletado: {total_deleted}, Erros: {total_errors}")
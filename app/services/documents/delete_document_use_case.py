@@ -7,7 +7,8 @@ from sqlalchemy.orm import Session
 from app.config.database import commit, delete, get_by_attribute
 from app.models.document import Document
 from app.schemas.error import Error
-from app.services.rag.rag_service import RagService
+from app.services.llm.semantic_cache import invalidate_answer_cache
+from app.services.rag.rag_service import RagService, get_rag_service
 from app.utils.google_drive import authenticate_google_drive
 
 logger = logging.getLogger(__name__)
@@ -16,7 +17,11 @@ logger = logging.getLogger(__name__)
 class DeleteDocumentUseCase:
     @staticmethod
     @commit
-    def execute(db: Session, g_file_id: str) -> Tuple[None, Optional[Error]]:
+    def execute(
+        db: Session,
+        g_file_id: str,
+        rag_service: Optional[RagService] = None,
+    ) -> Tuple[None, Optional[Error]]:
         try:
             # Delete from Google Drive
             drive_service = authenticate_google_drive()
@@ -31,9 +36,10 @@ class DeleteDocumentUseCase:
 
         # Delete from ChromaDB
         try:
-            rag_service = RagService()
+            rag_service = rag_service or get_rag_service()
             delete_result = rag_service.delete_by_g_file_id(g_file_id)
             logger.info(f"ChromaDB deletion result: {delete_result}")
+            invalidate_answer_cache()
         except Exception as e:
             logger.error(f'Error deleting file from ChromaDB: {e}')
             # Continue with database deletion even if ChromaDB fails
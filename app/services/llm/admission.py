@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import math
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Hashable
+
+from app.config.settings import get_settings
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when an LLM stream cannot be admitted; maps to HTTP 429."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A granted LLM stream slot. ``release`` is safe to call many times."""
+
+    def __init__(self, controller: 'AdmissionController', key: Hashable):
+        self._controller = controller
+        self.key = key
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self.key)
+
+
+@dataclass
+class _Waiter:
+    key: Hashable
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """
+    Caps how many LLM streams a worker runs at once.
+
+    A stream is admitted when fewer than ``max_concurrent`` streams are
+    running and its user holds fewer than ``max_per_user`` of them.
+    Otherwise it waits in a FIFO queue of at most ``max_queue`` entries for
+    up to ``queue_timeout`` seconds; a slot freed by a release goes to the
+    oldest waiter whose user is still under its share. Waiters blocked only
+    by their own user's cap do not hold back other users. Each user may only
+    queue ``max_per_user`` requests, so one client cannot fill the queue.
+
+    All methods must run on the event loop thread of the worker.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rejected = 0
+        self._active = 0
+        self._active_by_key: Dict[Hashable, int] = defaultdict(int)
+        self._waiting_by_key: Dict[Hashable, int] = defaultdict(int)
+        self._waiters: Deque[_Waiter] = deque()
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    async def acquire(self, key: Hashable) -> AdmissionTicket:
+        """Wait for a slot for ``key`` (the user id) and return its ticket."""
+        if self._can_admit(key) and not self._has_admissible_waiter():
+            return self._admit(key)
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject('LLM queue is full')
+        if self._waiting_by_key.get(key, 0) >= self.max_per_user:
+            self._reject('Too many queued requests for this user')
+
+        waiter = _Waiter(key, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._waiting_by_key[key] += 1
+
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(waiter.future), self.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+        # The grant may land right at the timeout boundary
+        if waiter.future.done():
+            return waiter.future.result()
+
+        self._abandon(waiter)
+        self._reject('Timed out waiting for an LLM slot')
+
+    def stats(self) -> dict:
+        return {
+            'active': self._active,
+            'queued': len(self._waiters),
+            'max_concurrent': self.max_concurrent,
+            'max_per_user': self.max_per_user,
+            'max_queue': self.max_queue,
+            'rejected': self.rejected,
+        }
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Drop a waiter that gave up, returning its slot if it was granted."""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            self._decrement(self._waiting_by_key, waiter.key)
+            waiter.future.cancel()
+        elif waiter.future.done() and not waiter.future.cancelled():
+            waiter.future.result().release()
+
+    def _can_admit(self, key: Hashable) -> bool:
+        return (
+            self._active < self.max_concurrent
+            and self._active_by_key.get(key, 0) < self.max_per_user
+        )
+
+    def _has_admissible_waiter(self) -> bool:
+        """
+        Whether a queued request could take a free slot right now. Waiters
+        held back only by their own user's cap do not block other users.
+        """
+        return any(
+            not waiter.future.done() and self._can_admit(waiter.key)
+            for waiter in self._waiters
+        )
+
+    def _admit(self, key: Hashable) -> AdmissionTicket:
+        self._active += 1
+        self._active_by_key[key] += 1
+        return AdmissionTicket(self, key)
+
+    def _release(self, key: Hashable) -> None:
+        self._active -= 1
+        self._decrement(self._active_by_key, key)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for waiter in list(self._waiters):
+            if self._active >= self.max_concurrent:
+                return
+            if waiter.future.done() or not self._can_admit(waiter.key):
+                continue
+
+            self._waiters.remove(waiter)
+            self._decrement(self._waiting_by_key, waiter.key)
+            waiter.future.set_result(self._admit(waiter.key))
+
+    def _reject(self, reason: str) -> None:
+        self.rejected += 1
+        logger.warning(
+            f'{reason} ({self._active} active, {len(self._waiters)} queued)'
+        )
+        raise AdmissionRejectedError(reason, self.retry_after)
+
+    @staticmethod
+    def _decrement(counter: Dict[Hashable, int], key: Hashable) -> None:
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+
+
+def _build_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrent=settings.LLM_MAX_CONCURRENT_STREAMS,
+        max_per_user=settings.LLM_MAX_STREAMS_PER_USER,
+        max_queue=settings.LLM_ADMISSION_QUEUE_SIZE,
+        queue_timeout=settings.LLM_ADMISSION_TIMEOUT_SECONDS,
+    )
+
+
+_admission_controller: ProcessSingleton[AdmissionController] = (
+    ProcessSingleton(_build_admission_controller)
+)
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the admission controller shared by every LLM stream."""
+    return _admission_controller.get()
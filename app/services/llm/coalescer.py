@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from app.config.settings import get_settings
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One upstream generation shared by every identical concurrent prompt."""
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class StreamCoalescer:
+    """
+    Single-flight fan-out for identical in-flight LLM prompts.
+
+    The first request for a key starts the upstream stream in a background
+    task; every chunk is buffered and broadcast to all subscribers. Requests
+    that join later first get the buffered prefix replayed, then follow the
+    live stream. When the last subscriber leaves before the end, the
+    upstream stream is cancelled. A finished flight is forgotten, so this
+    only merges concurrent requests and never serves stale answers.
+
+    All methods must run on the event loop thread of the worker.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.coalesced = 0
+
+    async def stream(
+        self,
+        key: Hashable,
+        factory: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        flight = self._flights.get(key)
+
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(
+                self._pump(key, flight, factory())
+            )
+        else:
+            self.coalesced += 1
+            logger.info(
+                f'Joined an in-flight LLM stream ({flight.subscribers} '
+                f'subscribers, {len(flight.chunks)} chunks buffered)'
+            )
+
+        flight.subscribers += 1
+        position = 0
+
+        try:
+            while True:
+                while position < len(flight.chunks):
+                    yield flight.chunks[position]
+                    position += 1
+
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                flight.task.cancel()
+
+    async def _pump(
+        self, key: Hashable, flight: _Flight, iterator: AsyncIterator[str]
+    ) -> None:
+        try:
+            async for chunk in iterator:
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            logger.info('Cancelled an LLM stream with no subscribers left')
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.notify()
+
+            aclose = getattr(iterator, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+
+_coalescer: ProcessSingleton[StreamCoalescer] = ProcessSingleton(
+    StreamCoalescer
+)
+
+
+def get_stream_coalescer() -> Optional[StreamCoalescer]:
+    """Return the process-wide coalescer, or None when it is disabled."""
+    if not get_settings().LLM_COALESCING_ENABLED:
+        return None
+
+    return _coalescer.get()
@@ -1,79 +1,308 @@
+import asyncio
+import hashlib
+import random
+import threading
 from abc import ABC, abstractmethod
-from typing import AsyncIterator
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
 
-from anthropic import AsyncAnthropic
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from ollama import AsyncClient
 
-from app.config.settings import Settings
+from app.config.settings import Settings, get_settings
+from app.services.llm.coalescer import get_stream_coalescer
+
+
+def _connection_limits(settings: Settings) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+@dataclass
+class LLMUsage:
+    """
+    Token usage reported by the provider for one generation.
+
+    Strategies fill it in while streaming. For Anthropic, ``input_tokens``
+    excludes the prompt tokens read from or written to the prompt cache.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+class LLMProviderError(Exception):
+    """
+    Raised by a strategy when the provider cannot produce an answer.
+
+    The message is meant for the end user; routes show it in place of the
+    answer, and nothing derived from it (e.g. the answer cache) may treat it
+    as a generated answer.
+    """
 
 
 class LLMStrategy(ABC):
     @abstractmethod
-    async def execute(self, prompt: str) -> AsyncIterator[str]:
-        pass
+    async def execute(
+        self,
+        prompt: str,
+        context: str = '',
+        usage: Optional[LLMUsage] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the answer to ``prompt``.
+
+        ``context`` is the retrieved-documents block; it is sent before the
+        prompt and is the same for every question answered from the same
+        chunks, so strategies may mark it as cacheable.
+        """
+
+    async def aclose(self) -> None:
+        """Release the HTTP connections held by the strategy."""
 
 
 class LLMStrategyFactory:
+    """
+    Builds the configured strategy once per process.
+
+    Strategies own a pooled HTTP client, so reusing them keeps TLS sessions
+    and keep-alive connections warm across chat turns.
+    """
+
+    _strategy: Optional[LLMStrategy] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_strategy(cls) -> LLMStrategy:
+        if cls._strategy is None:
+            with cls._lock:
+                if cls._strategy is None:
+                    cls._strategy = cls.create_strategy()
+
+        return cls._strategy
+
     @staticmethod
-    def get_strategy() -> LLMStrategy:
-        llm_type = Settings().LLM_PROVIDER
+    def create_strategy() -> LLMStrategy:
+        llm_type = get_settings().LLM_PROVIDER
 
         if llm_type.lower() == 'anthropic':
             return ClaudeStrategy()
         elif llm_type.lower() == 'ollama':
             return OllamaStrategy()
+        elif llm_type.lower() == 'simulated':
+            return SimulatedStrategy()
         else:
             raise ValueError(f'Unsupported LLM type: {llm_type}')
 
+    @classmethod
+    async def close(cls) -> None:
+        with cls._lock:
+            strategy, cls._strategy = cls._strategy, None
+
+        if strategy is not None:
+            await strategy.aclose()
+
 
 class ClaudeStrategy(LLMStrategy):
     def __init__(self) -> None:
-        self.api_key = Settings().ANTHROPIC_API_KEY
-        self.model = Settings().ANTHROPIC_MODEL
-        self.system_prompt = Settings().LLM_SYSTEM_PROMPT
+        settings = get_settings()
+        self.api_key = settings.ANTHROPIC_API_KEY
+        self.model = settings.ANTHROPIC_MODEL
+        self.system_prompt = settings.LLM_SYSTEM_PROMPT
+        self.max_tokens = settings.LLM_MAX_TOKENS
+        self.client = AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=_connection_limits(settings)
+            ),
+        )
 
-    async def execute(self, prompt: str) -> AsyncIterator[str]:
-        client = AsyncAnthropic(api_key=self.api_key)
+    async def execute(
+        self,
+        prompt: str,
+        context: str = '',
+        usage: Optional[LLMUsage] = None,
+    ) -> AsyncIterator[str]:
+        # The system prompt and the context block are stable prefixes, so
+        # both are marked for Anthropic's prompt cache. Prefixes shorter than
+        # the model's minimum cacheable length are simply not cached.
+        content = []
+        if context:
+            content.append({
+                'type': 'text',
+                'text': context,
+                'cache_control': {'type': 'ephemeral'},
+            })
+        content.append({'type': 'text', 'text': prompt})
 
-        response = await client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
-            messages=[
-                {'role': 'assistant', 'content': self.system_prompt},
-                {'role': 'user', 'content': prompt},
+            system=[
+                {
+                    'type': 'text',
+                    'text': self.system_prompt,
+                    'cache_control': {'type': 'ephemeral'},
+                }
             ],
-            max_tokens=3000,
+            messages=[{'role': 'user', 'content': content}],
+            max_tokens=self.max_tokens,
             stream=True,
         )
 
-        async for chunk in response:
-            if chunk.type == 'content_block_delta':
-                yield chunk.delta.text
+        try:
+            async for chunk in response:
+                if chunk.type == 'content_block_delta':
+                    yield chunk.delta.text
+                elif chunk.type == 'message_start' and usage is not None:
+                    message_usage = chunk.message.usage
+                    usage.input_tokens = message_usage.input_tokens
+                    usage.output_tokens = message_usage.output_tokens
+                    usage.cache_read_tokens = (
+                        message_usage.cache_read_input_tokens or 0
+                    )
+                    usage.cache_write_tokens = (
+                        message_usage.cache_creation_input_tokens or 0
+                    )
+                elif chunk.type == 'message_delta' and usage is not None:
+                    # Cumulative count of generated tokens
+                    usage.output_tokens = chunk.usage.output_tokens
+        finally:
+            # Closing the stream early stops generation on Anthropic's side
+            await response.close()
+
+    async def aclose(self) -> None:
+        await self.client.close()
 
 
 class OllamaStrategy(LLMStrategy):
     def __init__(self) -> None:
-        self.api_url = Settings().OLLAMA_API_URL
-        self.model = Settings().OLLAMA_MODEL
-        self.timeout = Settings().OLLAMA_TIMEOUT
+        settings = get_settings()
+        self.api_url = settings.OLLAMA_API_URL
+        self.model = settings.OLLAMA_MODEL
+        self.timeout = settings.OLLAMA_TIMEOUT
+        self.system_prompt = settings.LLM_SYSTEM_PROMPT
+        self.max_tokens = settings.LLM_MAX_TOKENS
+        # ollama.AsyncClient builds its httpx client internally and has no
+        # public close, so the strategy owns the connection pool instead
+        self.transport = httpx.AsyncHTTPTransport(
+            limits=_connection_limits(settings)
+        )
+        self.client = AsyncClient(
+            host=self.api_url,
+            timeout=self.timeout,
+            transport=self.transport,
+        )
 
-    async def execute(self, prompt: str) -> AsyncIterator[str]:
-        client = AsyncClient(host=self.api_url)
+    async def execute(
+        self,
+        prompt: str,
+        context: str = '',
+        usage: Optional[LLMUsage] = None,
+    ) -> AsyncIterator[str]:
         try:
             messages = [
-                {'role': 'system', 'content': Settings().LLM_SYSTEM_PROMPT},
-                {'role': 'user', 'content': prompt},
+                {'role': 'system', 'content': self.system_prompt},
+                {
+                    'role': 'user',
+                    'content': f'{context}\n\n{prompt}' if context else prompt,
+                },
             ]
-            response = await client.chat(
-                model=self.model, messages=messages, stream=True
+            response = await self.client.chat(
+                model=self.model,
+                messages=messages,
+                stream=True,
+                options={'num_predict': self.max_tokens},
             )
-            async for chunk in response:
-                yield (
-                    chunk['message']['content']
-                    if 'message' in chunk
-                    else chunk.get('content', '')
-                )
+            try:
+                async for chunk in response:
+                    if usage is not None and chunk.get('done'):
+                        usage.input_tokens = (
+                            chunk.get('prompt_eval_count') or 0
+                        )
+                        usage.output_tokens = chunk.get('eval_count') or 0
+                    yield (
+                        chunk['message']['content']
+                        if 'message' in chunk
+                        else chunk.get('content', '')
+                    )
+            finally:
+                # Closes the underlying HTTP response, which makes Ollama
+                # stop generating
+                await response.aclose()
         except Exception as e:
-            yield f'Erro ao conectar com Ollama: {str(e)}'
+            raise LLMProviderError(f'Erro ao conectar com Ollama: {e}') from e
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class SimulatedLLMError(Exception):
+    """Failure injected by SimulatedStrategy."""
+
+
+class SimulatedStrategy(LLMStrategy):
+    """
+    Local stand-in for a real provider, for load tests.
+
+    Streams deterministic text (the same prompt always yields the same
+    answer) with a configurable time to first token, token rate and
+    failure rate, so the whole chat pipeline can be benchmarked without
+    spending provider tokens. Failures are drawn from a generator seeded
+    with ``SIMULATED_LLM_SEED``, so a test run is reproducible too.
+    """
+
+    WORDS = (
+        'requisitos', 'software', 'teste', 'arquitetura', 'projeto',
+        'processo', 'qualidade', 'código', 'módulo', 'integração',
+        'usuário', 'sistema', 'modelo', 'entrega', 'equipe', 'revisão',
+        'componente', 'interface', 'dados', 'versão', 'o', 'a', 'de',
+        'para', 'com', 'que', 'é', 'um', 'uma', 'e', 'no', 'na',
+    )
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.model = 'simulated'
+        self.ttft_seconds = settings.SIMULATED_LLM_TTFT_MS / 1000
+        self.tokens_per_second = settings.SIMULATED_LLM_TOKENS_PER_SECOND
+        self.error_rate = settings.SIMULATED_LLM_ERROR_RATE
+        self.response_tokens = min(
+            settings.SIMULATED_LLM_RESPONSE_TOKENS, settings.LLM_MAX_TOKENS
+        )
+        self.seed = settings.SIMULATED_LLM_SEED
+        self._failures = random.Random(self.seed)
+
+    async def execute(
+        self,
+        prompt: str,
+        context: str = '',
+        usage: Optional[LLMUsage] = None,
+    ) -> AsyncIterator[str]:
+        digest = hashlib.sha256(f'{context}\n{prompt}'.encode()).digest()
+        words = random.Random(self.seed ^ int.from_bytes(digest[:8], 'big'))
+
+        if usage is not None:
+            # Same ~4 characters per token estimate as the prompt builder
+            usage.input_tokens = (len(context) + len(prompt)) // 4
+
+        await asyncio.sleep(self.ttft_seconds)
+
+        # Decided before the first token, like a provider error response
+        if self._failures.random() < self.error_rate:
+            raise SimulatedLLMError('Simulated provider failure')
+
+        interval = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        for index in range(self.response_tokens):
+            if index:
+                await asyncio.sleep(interval)
+            if usage is not None:
+                usage.output_tokens = index + 1
+            yield ('' if index == 0 else ' ') + words.choice(self.WORDS)
 
 
 class LLMService:
@@ -86,8 +315,29 @@ class LLMService:
         return cls._instance
 
     @staticmethod
-    async def execute(prompt: str) -> AsyncIterator[str]:
+    async def execute(
+        prompt: str,
+        context: str = '',
+        usage: Optional[LLMUsage] = None,
+    ) -> AsyncIterator[str]:
         strategy = LLMStrategyFactory.get_strategy()
+        coalescer = get_stream_coalescer()
 
-        async for chunk in strategy.execute(prompt):
+        if coalescer is None:
+            async for chunk in strategy.execute(prompt, context, usage):
+                yield chunk
+            return
+
+        # Identical prompts for the same provider and model share one
+        # stream. Only the request that started it gets the usage filled
+        # in; the others cost no provider tokens.
+        key = (
+            type(strategy).__name__,
+            getattr(strategy, 'model', None),
+            context,
+            prompt,
+        )
+        async for chunk in coalescer.stream(
+            key, lambda: strategy.execute(prompt, context, usage)
+        ):
             yield chunk
@@ -0,0 +1,289 @@
+import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TEMPLATE = 'Contexto:\n{context}'
+QUESTION_TEMPLATE = (
+    'Baseado no contexto acima, responda a pergunta.\n\n'
+    'Pergunta: {question}'
+)
+SUMMARY_HEADER = 'Resumo da conversa anterior (perguntas do usuário):'
+SUMMARY_ITEM_MAX_CHARS = 160
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for budgeting, at about 4 characters per token.
+
+    It needs no tokenizer and runs in microseconds; the budget is a safety
+    margin, not an exact limit, so an estimate is enough.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
+
+
+@dataclass
+class BuiltPrompt:
+    """
+    The final prompt plus the token accounting behind it.
+
+    ``context`` holds the retrieved chunks and comes first, so identical
+    contexts form a stable prefix that providers can cache; ``conversation``
+    holds the summary, the kept turns and the current question.
+    """
+
+    context: str
+    conversation: str
+    budget_tokens: int
+    system_tokens: int
+    question_tokens: int
+    context_tokens: int
+    history_tokens: int
+    summary_tokens: int
+    chunks_kept: int
+    chunks_dropped: int
+    messages_kept: int
+    messages_dropped: int
+
+    @property
+    def text(self) -> str:
+        """Context and conversation as a single prompt string."""
+        if not self.context:
+            return self.conversation
+        return f'{self.context}\n\n{self.conversation}'
+
+    @property
+    def total_tokens(self) -> int:
+        return (
+            self.system_tokens
+            + self.question_tokens
+            + self.context_tokens
+            + self.history_tokens
+            + self.summary_tokens
+        )
+
+
+class PromptBuilder:
+    """
+    Assemble the chat prompt within a token budget.
+
+    Priority order: the system prompt (sent separately by the strategy but
+    counted here) and the current question are always kept. Then come the
+    retrieved chunks, in rank order, up to ``context_share`` of what is left,
+    and then the newest conversation turns. Older turns that do not fit are
+    replaced by a short extractive summary of the user's earlier questions.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        system_prompt: str,
+        context_share: float = 0.6,
+        summary_max_tokens: int = 200,
+    ):
+        self.budget_tokens = budget_tokens
+        self.system_prompt = system_prompt
+        self.context_share = context_share
+        self.summary_max_tokens = summary_max_tokens
+
+    def build(
+        self,
+        question: str,
+        history: Sequence[Dict[str, str]],
+        context_chunks: Sequence[str] = (),
+    ) -> BuiltPrompt:
+        system_tokens = estimate_tokens(self.system_prompt)
+        question_tokens = estimate_tokens(
+            CONTEXT_TEMPLATE.format(context='')
+            + QUESTION_TEMPLATE.format(question=question)
+            if context_chunks
+            else question
+        )
+        remaining = max(
+            0, self.budget_tokens - system_tokens - question_tokens
+        )
+
+        kept_chunks = self._select_chunks(
+            context_chunks, int(remaining * self.context_share)
+        )
+        context_tokens = sum(estimate_tokens(chunk) for chunk in kept_chunks)
+        remaining -= context_tokens
+
+        kept_messages, history_tokens, summary = self._fit_history(
+            history, remaining
+        )
+        summary_tokens = estimate_tokens(summary)
+
+        if kept_chunks:
+            context = CONTEXT_TEMPLATE.format(context='\n'.join(kept_chunks))
+            user_content = QUESTION_TEMPLATE.format(question=question)
+        else:
+            context = ''
+            user_content = question
+
+        lines = [summary] if summary else []
+        lines.extend(_format_message(message) for message in kept_messages)
+        lines.append(
+            _format_message({'role': 'user', 'content': user_content})
+        )
+
+        built = BuiltPrompt(
+            context=context,
+            conversation='\n'.join(lines),
+            budget_tokens=self.budget_tokens,
+            system_tokens=system_tokens,
+            question_tokens=question_tokens,
+            context_tokens=context_tokens,
+            history_tokens=history_tokens,
+            summary_tokens=summary_tokens,
+            chunks_kept=len(kept_chunks),
+            chunks_dropped=len(context_chunks) - len(kept_chunks),
+            messages_kept=len(kept_messages),
+            messages_dropped=len(history) - len(kept_messages),
+        )
+        self._log(built)
+        return built
+
+    def _fit_history(
+        self, history: Sequence[Dict[str, str]], budget: int
+    ) -> Tuple[List[Dict[str, str]], int, str]:
+        """
+        Keep the newest messages that fit in ``budget`` and summarize the
+        dropped ones in what is left. Returns the kept messages, their token
+        count and the summary.
+        """
+        # When the whole history does not fit, room is left for the summary
+        # of the turns that will be dropped.
+        history_budget = budget
+        full_history_tokens = sum(
+            estimate_tokens(_format_message(message)) for message in history
+        )
+        if full_history_tokens > budget:
+            history_budget = max(0, budget - self.summary_max_tokens)
+
+        kept_messages = self._select_history(history, history_budget)
+        history_tokens = sum(
+            estimate_tokens(_format_message(message))
+            for message in kept_messages
+        )
+
+        dropped_messages = history[: len(history) - len(kept_messages)]
+        summary = self._summarize(
+            dropped_messages,
+            min(budget - history_tokens, self.summary_max_tokens),
+        )
+        return kept_messages, history_tokens, summary
+
+    @staticmethod
+    def _select_chunks(chunks: Sequence[str], budget: int) -> List[str]:
+        """Keep the best-ranked chunks, in order, until the budget is spent."""
+        kept, used = [], 0
+
+        for chunk in chunks:
+            tokens = estimate_tokens(chunk)
+            if used + tokens > budget:
+                break
+            kept.append(chunk)
+            used += tokens
+
+        return kept
+
+    @staticmethod
+    def _select_history(
+        history: Sequence[Dict[str, str]], budget: int
+    ) -> List[Dict[str, str]]:
+        """Keep the newest messages whose total fits in the budget."""
+        kept, used = [], 0
+
+        for message in reversed(history):
+            tokens = estimate_tokens(_format_message(message))
+            if used + tokens > budget:
+                break
+            kept.append(message)
+            used += tokens
+
+        kept.reverse()
+
+        # Never start the window with an orphan assistant answer
+        if kept and kept[0]['role'] == 'assistant':
+            kept.pop(0)
+
+        return kept
+
+    @staticmethod
+    def _summarize(messages: Sequence[Dict[str, str]], budget: int) -> str:
+        """
+        Summarize dropped turns as the first sentence of each earlier user
+        question, newest first, while they fit in the budget.
+        """
+        if not messages or budget <= estimate_tokens(SUMMARY_HEADER):
+            return ''
+
+        used = estimate_tokens(SUMMARY_HEADER)
+        items = []
+
+        for message in reversed(messages):
+            if message['role'] != 'user':
+                continue
+
+            item = f'- {_first_sentence(message["content"])}'
+            tokens = estimate_tokens(item)
+            if used + tokens > budget:
+                break
+            items.append(item)
+            used += tokens
+
+        if not items:
+            return ''
+
+        items.reverse()
+        return '\n'.join([SUMMARY_HEADER, *items])
+
+    @staticmethod
+    def _log(built: BuiltPrompt) -> None:
+        message = (
+            f'Prompt: {built.total_tokens}/{built.budget_tokens} tokens '
+            f'(system {built.system_tokens}, '
+            f'question {built.question_tokens}, '
+            f'context {built.context_tokens} in {built.chunks_kept} chunks '
+            f'[{built.chunks_dropped} dropped], history '
+            f'{built.history_tokens} in {built.messages_kept} messages '
+            f'[{built.messages_dropped} dropped], summary '
+            f'{built.summary_tokens})'
+        )
+
+        if built.total_tokens > built.budget_tokens:
+            logger.warning(f'{message}: question alone exceeds the budget')
+        else:
+            logger.info(message)
+
+
+def _format_message(message: Dict[str, str]) -> str:
+    return f"{message['role']}: {message['content']}"
+
+
+def _first_sentence(text: str) -> str:
+    sentence = _SENTENCE_END.split(' '.join(text.split()), maxsplit=1)[0]
+    if len(sentence) > SUMMARY_ITEM_MAX_CHARS:
+        sentence = sentence[: SUMMARY_ITEM_MAX_CHARS - 3].rstrip() + '...'
+    return sentence
+
+
+def get_prompt_builder() -> PromptBuilder:
+    """Return a builder configured from the current settings."""
+    settings = get_settings()
+    return PromptBuilder(
+        budget_tokens=settings.PROMPT_TOKEN_BUDGET,
+        system_prompt=settings.LLM_SYSTEM_PROMPT,
+        context_share=settings.PROMPT_CONTEXT_SHARE,
+        summary_max_tokens=settings.PROMPT_SUMMARY_MAX_TOKENS,
+    )
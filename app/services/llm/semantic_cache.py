@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from app.config.settings import get_settings
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    embedding: Tuple[float, ...]
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Cache of LLM answers for near-duplicate first-turn questions.
+
+    An entry is a hit when it was answered from exactly the same retrieved
+    chunks and its question embedding has a cosine similarity of at least
+    ``threshold`` with the new one. Chunks are compared by id and by a hash
+    of their text, in retrieval order. Chunk ids only name a position in a
+    file (``<filename>_<n>``) and survive a re-upload, so the hash is what
+    keeps a re-uploaded document from being answered with its old text.
+    Because the key is derived from the content, this holds on every worker
+    without coordination; the document routes also call
+    ``invalidate_answer_cache`` to free the local worker's entries early.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        ttl_seconds: float = 0,
+        max_entries_per_context: int = 8,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_context = max_entries_per_context
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[str, ...], List[CachedAnswer]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        query_embedding: Sequence[float],
+        chunk_ids: Sequence[str],
+        chunks: Sequence[str],
+    ) -> Optional[str]:
+        key = context_key(chunk_ids, chunks)
+        embedding = _normalize(query_embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = self._entries.get(key, [])
+            best_answer, best_similarity = None, self.threshold
+
+            for entry in list(candidates):
+                if self._is_expired(entry, now):
+                    candidates.remove(entry)
+                    self._size -= 1
+                    continue
+
+                similarity = _dot(embedding, entry.embedding)
+                if similarity >= best_similarity:
+                    best_answer, best_similarity = entry.answer, similarity
+
+            if key in self._entries and not candidates:
+                del self._entries[key]
+
+            if best_answer is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            logger.info(
+                f'Semantic cache hit (similarity {best_similarity:.4f})'
+            )
+            return best_answer
+
+    def store(
+        self,
+        query_embedding: Sequence[float],
+        chunk_ids: Sequence[str],
+        chunks: Sequence[str],
+        answer: str,
+    ) -> None:
+        if self.max_entries <= 0 or not answer:
+            return
+
+        key = context_key(chunk_ids, chunks)
+        entry = CachedAnswer(
+            embedding=_normalize(query_embedding),
+            answer=answer,
+            created_at=time.monotonic(),
+        )
+
+        with self._lock:
+            candidates = self._entries.setdefault(key, [])
+            candidates.append(entry)
+            self._size += 1
+            self._entries.move_to_end(key)
+
+            if len(candidates) > self.max_entries_per_context:
+                candidates.pop(0)
+                self._size -= 1
+
+            while self._size > self.max_entries and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        logger.info('Semantic answer cache invalidated')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': self._size,
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _is_expired(self, entry: CachedAnswer, now: float) -> bool:
+        return (
+            self.ttl_seconds > 0 and now - entry.created_at > self.ttl_seconds
+        )
+
+
+async def replay_answer(
+    answer: str, chunk_size: int = 24
+) -> AsyncIterator[str]:
+    """Stream a cached answer in small pieces, like a live generation."""
+    for start in range(0, len(answer), chunk_size):
+        yield answer[start : start + chunk_size]
+        await asyncio.sleep(0)
+
+
+def context_key(
+    chunk_ids: Sequence[str], chunks: Sequence[str]
+) -> Tuple[str, ...]:
+    """Identify retrieved chunks by id and content, in retrieval order."""
+    return tuple(
+        f'{chunk_id}:{hashlib.sha256(chunk.encode()).hexdigest()[:16]}'
+        for chunk_id, chunk in zip(chunk_ids, chunks, strict=True)
+    )
+
+
+def _normalize(vector: Sequence[float]) -> Tuple[float, ...]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return tuple(value / norm for value in vector)
+
+
+def _dot(left: Sequence[float], right: Sequence[float]) -> float:
+    return math.fsum(a * b for a, b in zip(left, right))
+
+
+def _build_answer_cache() -> SemanticAnswerCache:
+    settings = get_settings()
+    return SemanticAnswerCache(
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    )
+
+
+_answer_cache: ProcessSingleton[SemanticAnswerCache] = ProcessSingleton(
+    _build_answer_cache
+)
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Return the process-wide answer cache, or None when it is disabled."""
+    if not get_settings().SEMANTIC_CACHE_ENABLED:
+        return None
+
+    return _answer_cache.get()
+
+
+def invalidate_answer_cache() -> None:
+    """Drop every cached answer, e.g. after the document set changed."""
+    cache = _answer_cache.peek()
+    if cache is not None:
+        cache.invalidate()
@@ -0,0 +1,83 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings with a time-to-live.
+
+    Keys are the normalized query text, so questions that only differ in
+    casing or spacing share the same entry. all-MiniLM-L6-v2 uses an uncased
+    tokenizer that splits on whitespace, which makes those variants produce
+    the same embedding anyway.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float = 0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, List[float]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(unicodedata.normalize('NFC', text).lower().split())
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.normalize(text)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self._is_expired(entry[0]):
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        if self.max_size <= 0:
+            return
+
+        key = self.normalize(text)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return (
+            self.ttl_seconds > 0
+            and time.monotonic() - stored_at > self.ttl_seconds
+        )
@@ -0,0 +1,155 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+(?:[-./]\w+)*')
+
+# Portuguese function words that carry no lexical signal (accents removed)
+STOPWORDS = frozenset({
+    'a', 'ao', 'aos', 'as', 'com', 'como', 'da', 'das', 'de', 'do', 'dos',
+    'e', 'em', 'entre', 'eh', 'isso', 'isto', 'mais', 'me', 'na', 'nas',
+    'no', 'nos', 'o', 'os', 'ou', 'para', 'pela', 'pelo', 'por', 'qual',
+    'quais', 'que', 'se', 'sobre', 'um', 'uma', 'umas', 'uns',
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase, accent-free terms.
+
+    Compound tokens such as course codes (``if-685``) or acronyms with
+    separators (``ci/cd``) are kept whole and also indexed by their parts,
+    so both exact codes and their pieces can match.
+    """
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    normalized = ''.join(
+        char for char in normalized if not unicodedata.combining(char)
+    )
+
+    terms = []
+    for token in TOKEN_PATTERN.findall(normalized):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(re.split(r'[-./]', token))
+
+    return [term for term in terms if term and term not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory inverted index scored with Okapi BM25.
+
+    It lives next to the Chroma collection and holds only term statistics
+    and chunk ids; chunk contents stay in Chroma.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        self.add_many([(doc_id, text)])
+
+    def add_many(self, documents: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            for doc_id, text in documents:
+                self._remove(doc_id)
+
+                term_counts = Counter(tokenize(text))
+                for term, count in term_counts.items():
+                    self._postings[term][doc_id] = count
+
+                length = sum(term_counts.values())
+                self._doc_lengths[doc_id] = length
+                self._doc_terms[doc_id] = tuple(term_counts)
+                self._total_length += length
+
+    def remove_many(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_lengths.clear()
+            self._doc_terms.clear()
+            self._total_length = 0
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` (doc_id, score) pairs, best first."""
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            document_count = len(self._doc_lengths)
+            if not document_count or not query_terms:
+                return []
+
+            average_length = self._total_length / document_count
+            scores: Dict[str, float] = defaultdict(float)
+
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                document_frequency = len(postings)
+                idf = math.log(
+                    1
+                    + (document_count - document_frequency + 0.5)
+                    / (document_frequency + 0.5)
+                )
+
+                for doc_id, frequency in postings.items():
+                    length_norm = 1 - self.b + self.b * (
+                        self._doc_lengths[doc_id] / average_length
+                    )
+                    scores[doc_id] += idf * (
+                        frequency
+                        * (self.k1 + 1)
+                        / (frequency + self.k1 * length_norm)
+                    )
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def _remove(self, doc_id: str) -> None:
+        length = self._doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            del self._postings[term][doc_id]
+            if not self._postings[term]:
+                del self._postings[term]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60
+) -> List[str]:
+    """
+    Merge several ranked id lists with reciprocal rank fusion.
+
+    Each id scores ``sum(1 / (k + rank))`` over the lists it appears in.
+    Ties keep the order in which ids were first seen, so the first ranking
+    (the vector search) wins ties.
+    """
+    scores: Dict[str, float] = {}
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
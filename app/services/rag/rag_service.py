@@ -1,23 +1,68 @@
 import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Annotated, Callable, Dict, List, Optional
+
 import chromadb
+from chromadb.errors import NotFoundError
+from fastapi import Depends
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from app.config.settings import Settings
+from app.config.settings import get_settings
+from app.services.rag.embedding_cache import EmbeddingCache
+from app.services.rag.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.utils.singleton import ProcessSingleton
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class IngestionProgress:
+    """Running totals reported after each batch of process_document."""
+
+    pages_loaded: int = 0
+    chunks_stored: int = 0
+    batches: int = 0
+
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+
 class RagService:
     def __init__(self):
         logger.info("Initializing RagService...")
         
         self.embedding_function = HuggingFaceEmbeddings(
-            model_name='all-MiniLM-L6-v2'
+            model_name=EMBEDDING_MODEL
+        )
+
+        settings = get_settings()
+        self.embedding_cache = (
+            EmbeddingCache(
+                max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+                ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            )
+            if settings.EMBEDDING_CACHE_ENABLED
+            else None
+        )
+
+        self.ingest_batch_size = settings.INGEST_BATCH_SIZE
+        self.top_k = settings.RAG_TOP_K
+        self.hybrid_search_enabled = settings.RAG_HYBRID_SEARCH_ENABLED
+        self.candidate_pool = settings.RAG_CANDIDATE_POOL
+        self.rrf_k = settings.RAG_RRF_K
+        self.lexical_index_sync_interval = (
+            settings.LEXICAL_INDEX_SYNC_INTERVAL_SECONDS
         )
+        self.lexical_index = BM25Index()
+        # Chunk id -> Drive file id of every chunk in the lexical index
+        self._indexed_files: Dict[str, Optional[str]] = {}
+        self._lexical_index_synced_at = 0.0
         
         # Auto-detect SSL based on host protocol
-        chroma_host = Settings().CHROMA_HOST
+        chroma_host = settings.CHROMA_HOST
         use_ssl = chroma_host.startswith('https://')
         
         # Clean host URL (remove protocol if present)
@@ -36,7 +81,7 @@ class RagService:
         
         logger.info(f"ChromaDB client initialized with host: {clean_host}, SSL: {use_ssl}")
         
-        self.collection_name = Settings().CHROMA_COLLECTION
+        self.collection_name = settings.CHROMA_COLLECTION
         
         try:
             self.collection = self.client.get_or_create_collection(
@@ -47,90 +92,321 @@ class RagService:
             logger.error(f"Failed to initialize collection: {e}")
             raise e
 
-    def process_document(self, file_path: str, original_filename: str, drive_link: str = None, g_file_id: str = None):
-        """Process and store a document in the vector database."""
-        logger.info(f"Processing document: {original_filename}")
-        
+        self._collection_lock = threading.RLock()
+
+        if self.hybrid_search_enabled:
+            try:
+                self.rebuild_lexical_index()
+            except Exception as e:
+                # Searches retry through _sync_lexical_index_if_stale
+                logger.error(f"Failed to build lexical index: {e}")
+
+    def refresh_collection(self):
+        """Re-fetch the collection handle, e.g. after it was recreated."""
+        with self._collection_lock:
+            self.collection = self.client.get_or_create_collection(
+                name=self.collection_name
+            )
+            logger.info(f"Collection '{self.collection_name}' reconnected.")
+
+        if self.hybrid_search_enabled:
+            self.rebuild_lexical_index()
+
+    def rebuild_lexical_index(self, page_size: int = 1000):
+        """Rebuild the BM25 index from the chunks stored in Chroma."""
+        index = BM25Index()
+        files = {}
+
+        for page in self._collection_pages(
+            ["documents", "metadatas"], page_size
+        ):
+            index.add_many(zip(page["ids"], page.get("documents") or []))
+            files.update(_chunk_files(page))
+
+        # Swap the whole index at once so searches never see a partial one
+        self.lexical_index = index
+        self._indexed_files = files
+        self._lexical_index_synced_at = time.monotonic()
+        logger.info(f"Lexical index rebuilt with {len(index)} chunks")
+
+    def _sync_lexical_index_if_stale(self):
+        """Rebuild the BM25 index when Chroma was changed by another worker.
+
+        Each worker updates its own index on upload and delete. At most once
+        per sync interval, the chunk ids in Chroma and the Drive file each
+        one came from are compared with the index to pick up changes made
+        elsewhere. Comparing ids rather than counts catches deletes and
+        uploads that cancel out, and the file id catches a document deleted
+        and uploaded again under the same name, which keeps its chunk ids.
+        """
+        now = time.monotonic()
+        elapsed = now - self._lexical_index_synced_at
+        if elapsed < self.lexical_index_sync_interval:
+            return
+
+        self._lexical_index_synced_at = now
+        files = {}
+        for page in self._collection_pages(["metadatas"]):
+            files.update(_chunk_files(page))
+
+        if files != self._indexed_files:
+            logger.info(
+                f"Lexical index ({len(self._indexed_files)} chunks) is out of "
+                f"date with the collection ({len(files)} chunks), "
+                "rebuilding..."
+            )
+            self.rebuild_lexical_index()
+
+    def _collection_pages(self, include: List[str], page_size: int = 1000):
+        """Yield every chunk of the collection, ``page_size`` at a time."""
+        offset = 0
+
+        while True:
+            page = self._on_collection(lambda collection: collection.get(
+                include=include,
+                limit=page_size,
+                offset=offset
+            ))
+            yield page
+            offset += len(page["ids"])
+
+            if len(page["ids"]) < page_size:
+                break
+
+    def _index_chunks(
+        self, ids: List[str], texts: List[str], g_file_id: Optional[str]
+    ):
+        """Add chunks just stored in Chroma to the lexical index."""
+        self.lexical_index.add_many(zip(ids, texts))
+        self._indexed_files.update(dict.fromkeys(ids, g_file_id))
+
+    def _unindex_chunks(self, ids: List[str]):
+        """Remove chunks just deleted from Chroma from the lexical index."""
+        self.lexical_index.remove_many(ids)
+        for chunk_id in ids:
+            self._indexed_files.pop(chunk_id, None)
+
+    def _on_collection(self, operation):
+        """Run an operation on the collection, reconnecting once if it is gone.
+
+        Another worker may have dropped and recreated the collection (see
+        ``delete_all_documents``), which leaves our cached handle pointing to
+        a collection id that no longer exists.
+        """
         try:
-            loader = PyPDFLoader(file_path)
-            documents = loader.load()
-            logger.info(f"Loaded {len(documents)} pages from PDF")
-            
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
+            return operation(self.collection)
+        except NotFoundError:
+            logger.warning(
+                f"Collection '{self.collection_name}' not found, "
+                "reconnecting..."
             )
-            chunks = text_splitter.split_documents(documents)
-            logger.info(f"Split into {len(chunks)} chunks")
-            
-            ids = []
-            texts = []
-            metadatas = []
-            
-            for i, chunk in enumerate(chunks):
-                ids.append(f"{original_filename}_{i}")
-                texts.append(chunk.page_content)
-                
-                # Include Google Drive link and file ID in metadata
-                metadata = {
-                    "source": original_filename,
-                    "chunk_id": i,
-                    "page": chunk.metadata.get("page", 0)
-                }
-                
-                if drive_link:
-                    metadata["drive_link"] = drive_link
-                    
-                if g_file_id:
-                    metadata["g_file_id"] = g_file_id
-                    
-                metadatas.append(metadata)
-            
-            # Generate embeddings
+            self.refresh_collection()
+            return operation(self.collection)
+
+    def process_document(
+        self,
+        file_path: str,
+        original_filename: str,
+        drive_link: str = None,
+        g_file_id: str = None,
+        on_progress: Optional[Callable[[IngestionProgress], None]] = None,
+    ):
+        """Process and store a document in the vector database.
+
+        Pages are loaded lazily and their chunks are embedded and stored in
+        batches of ``INGEST_BATCH_SIZE``, so peak memory is bounded by one
+        batch regardless of the PDF size. ``on_progress`` is called after
+        every stored batch.
+        """
+        logger.info(f"Processing document: {original_filename}")
+
+        batch_size = self.ingest_batch_size
+        progress = IngestionProgress()
+        stored_ids = []
+
+        ids = []
+        texts = []
+        metadatas = []
+
+        def flush_batch():
             embeddings = self.embedding_function.embed_documents(texts)
-            logger.info("Generated embeddings")
-            
-            # Add to ChromaDB
-            self.collection.add(
+            self._on_collection(lambda collection: collection.add(
                 ids=ids,
                 documents=texts,
                 metadatas=metadatas,
                 embeddings=embeddings
+            ))
+            stored_ids.extend(ids)
+            self._index_chunks(ids, texts, g_file_id)
+
+            progress.batches += 1
+            progress.chunks_stored += len(ids)
+            logger.info(
+                f"Stored batch {progress.batches} of {original_filename}: "
+                f"{progress.chunks_stored} chunks from "
+                f"{progress.pages_loaded} pages so far"
+            )
+            if on_progress:
+                on_progress(progress)
+
+            ids.clear()
+            texts.clear()
+            metadatas.clear()
+
+        try:
+            loader = PyPDFLoader(file_path)
+
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200
+            )
+
+            chunk_index = 0
+            for page in loader.lazy_load():
+                progress.pages_loaded += 1
+
+                for chunk in text_splitter.split_documents([page]):
+                    ids.append(f"{original_filename}_{chunk_index}")
+                    texts.append(chunk.page_content)
+
+                    # Include Google Drive link and file ID in metadata
+                    metadata = {
+                        "source": original_filename,
+                        "chunk_id": chunk_index,
+                        "page": chunk.metadata.get("page", 0)
+                    }
+
+                    if drive_link:
+                        metadata["drive_link"] = drive_link
+
+                    if g_file_id:
+                        metadata["g_file_id"] = g_file_id
+
+                    metadatas.append(metadata)
+                    chunk_index += 1
+
+                    if len(ids) >= batch_size:
+                        flush_batch()
+
+            if ids:
+                flush_batch()
+
+            logger.info(
+                f"Successfully processed and stored {progress.chunks_stored} "
+                f"chunks from {progress.pages_loaded} pages"
             )
-            
-            logger.info(f"Successfully processed and stored {len(chunks)} chunks")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error processing document: {e}")
+
+            # Do not leave a half-indexed document behind
+            if stored_ids:
+                try:
+                    self._on_collection(
+                        lambda collection: collection.delete(ids=stored_ids)
+                    )
+                    self._unindex_chunks(stored_ids)
+                except Exception as cleanup_error:
+                    logger.error(
+                        "Error removing partially stored chunks: "
+                        f"{cleanup_error}"
+                    )
             return False
 
-    def search(self, query: str, k: int = 4):
-        """Search for relevant documents."""
+    def embed_query(self, query: str):
+        """Embed a search query, reusing cached embeddings when possible."""
+        if self.embedding_cache is None:
+            return self.embedding_function.embed_query(query)
+
+        embedding = self.embedding_cache.get(query)
+        if embedding is None:
+            embedding = self.embedding_function.embed_query(query)
+            self.embedding_cache.put(query, embedding)
+
+        return embedding
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+    ):
+        """Search for relevant documents.
+
+        With hybrid search enabled, a candidate pool is ranked both by vector
+        similarity and by BM25 over the lexical index, the two rankings are
+        merged with reciprocal rank fusion and the top ``k`` chunks are
+        returned. Exact hits on course codes and acronyms then make it into
+        a small ``k`` without over-fetching.
+
+        ``query_embedding`` can be passed when the caller already embedded
+        the query.
+        """
         logger.info(f"Searching for: '{query}'")
+        k = k or self.top_k
         
         try:
             # Generate query embedding
-            query_embedding = self.embedding_function.embed_query(query)
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+
+            n_candidates = (
+                max(k, self.candidate_pool)
+                if self.hybrid_search_enabled
+                else k
+            )
             
             # Search in ChromaDB
-            results = self.collection.query(
+            results = self._on_collection(lambda collection: collection.query(
                 query_embeddings=[query_embedding],
-                n_results=k
-            )
+                n_results=n_candidates
+            ))
             
             # Extract documents and metadata
+            ids = results.get("ids", [[]])[0]
             documents = results.get("documents", [[]])[0]
             metadatas = results.get("metadatas", [[]])[0]
-            logger.info(f"Found {len(documents)} relevant documents")
-            
+
+            hits = {
+                doc_id: {"id": doc_id, "content": doc, "metadata": metadata}
+                for doc_id, doc, metadata in zip(ids, documents, metadatas)
+            }
+            ranking = ids
+
+            if self.hybrid_search_enabled:
+                self._sync_lexical_index_if_stale()
+                lexical_hits = self.lexical_index.search(query, n_candidates)
+                lexical_ids = [doc_id for doc_id, _ in lexical_hits]
+                ranking = reciprocal_rank_fusion(
+                    [ids, lexical_ids], k=self.rrf_k
+                )
+
+            top_ids = ranking[:k]
+
+            # Chunks found only by the lexical index are fetched by id
+            missing_ids = [doc_id for doc_id in top_ids if doc_id not in hits]
+            if missing_ids:
+                fetched = self._on_collection(
+                    lambda collection: collection.get(
+                        ids=missing_ids,
+                        include=["documents", "metadatas"]
+                    )
+                )
+                for doc_id, doc, metadata in zip(
+                    fetched.get("ids", []),
+                    fetched.get("documents", []),
+                    fetched.get("metadatas", [])
+                ):
+                    hits[doc_id] = {
+                        "id": doc_id, "content": doc, "metadata": metadata
+                    }
+
             # Return documents with their metadata
-            search_results = []
-            for doc, metadata in zip(documents, metadatas):
-                search_results.append({
-                    "content": doc,
-                    "metadata": metadata
-                })
+            search_results = [
+                hits[doc_id] for doc_id in top_ids if doc_id in hits
+            ]
+            logger.info(f"Found {len(search_results)} relevant documents")
             
             return search_results
             
@@ -144,7 +420,9 @@ class RagService:
         
         try:
             # Get all documents (or up to limit)
-            results = self.collection.get(limit=limit)
+            results = self._on_collection(
+                lambda collection: collection.get(limit=limit)
+            )
             
             documents = results.get("documents", [])
             metadatas = results.get("metadatas", [])
@@ -171,11 +449,16 @@ class RagService:
     def get_collection_info(self):
         """Get information about the collection."""
         try:
-            count = self.collection.count()
+            count = self._on_collection(lambda collection: collection.count())
             return {
                 "collection_name": self.collection_name,
                 "document_count": count,
-                "status": "active"
+                "status": "active",
+                "embedding_cache": (
+                    self.embedding_cache.stats()
+                    if self.embedding_cache is not None
+                    else None
+                )
             }
         except Exception as e:
             logger.error(f"Error getting collection info: {e}")
@@ -186,19 +469,13 @@ class RagService:
         logger.info(f"Deleting document with g_file_id: {g_file_id}")
         
         try:
-            # Get all documents to find those with matching g_file_id
-            all_docs = self.collection.get()
-            
-            ids_to_delete = []
-            metadatas = all_docs.get("metadatas", [])
-            ids = all_docs.get("ids", [])
-            
-            for doc_id, metadata in zip(ids, metadatas):
-                if metadata.get("g_file_id") == g_file_id:
-                    ids_to_delete.append(doc_id)
+            ids_to_delete = self._find_ids_by_g_file_ids([g_file_id])
             
             if ids_to_delete:
-                self.collection.delete(ids=ids_to_delete)
+                self._on_collection(
+                    lambda collection: collection.delete(ids=ids_to_delete)
+                )
+                self._unindex_chunks(ids_to_delete)
                 logger.info(f"Deleted {len(ids_to_delete)} chunks for g_file_id: {g_file_id}")
                 return {"deleted_chunks": len(ids_to_delete), "g_file_id": g_file_id}
             else:
@@ -209,17 +486,70 @@ class RagService:
             logger.error(f"Error deleting document by g_file_id: {e}")
             return {"error": str(e)}
 
+    def delete_by_g_file_ids(self, g_file_ids: List[str]):
+        """Delete all chunks of several documents in a single round-trip."""
+        logger.info(f"Deleting {len(g_file_ids)} documents by g_file_id")
+
+        if not g_file_ids:
+            return {"deleted_chunks": 0, "g_file_ids": []}
+
+        try:
+            ids_to_delete = self._find_ids_by_g_file_ids(g_file_ids)
+
+            if ids_to_delete:
+                self._on_collection(
+                    lambda collection: collection.delete(ids=ids_to_delete)
+                )
+                self._unindex_chunks(ids_to_delete)
+
+            logger.info(
+                f"Deleted {len(ids_to_delete)} chunks for "
+                f"{len(g_file_ids)} g_file_ids"
+            )
+            return {
+                "deleted_chunks": len(ids_to_delete),
+                "g_file_ids": g_file_ids,
+            }
+
+        except Exception as e:
+            logger.error(f"Error deleting documents by g_file_ids: {e}")
+            return {"error": str(e)}
+
+    def _find_ids_by_g_file_ids(self, g_file_ids: List[str]) -> List[str]:
+        """Return the chunk ids of the given documents.
+
+        The predicate is evaluated by Chroma through a metadata ``where``
+        filter and only ids are returned, so the cost is proportional to the
+        matching chunks instead of the whole collection.
+        """
+        if len(g_file_ids) == 1:
+            where = {"g_file_id": g_file_ids[0]}
+        else:
+            where = {"g_file_id": {"$in": list(g_file_ids)}}
+
+        results = self._on_collection(
+            lambda collection: collection.get(where=where, include=[])
+        )
+        return results.get("ids", [])
+
     def delete_all_documents(self):
         """Delete all documents from the collection."""
         logger.warning("Deleting ALL documents from the collection")
         
         try:
-            # Get count before deletion
-            count_before = self.collection.count()
-            
-            # Delete the entire collection and recreate it
-            self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(name=self.collection_name)
+            with self._collection_lock:
+                # Get count before deletion
+                count_before = self._on_collection(
+                    lambda collection: collection.count()
+                )
+
+                # Delete the entire collection and recreate it
+                self.client.delete_collection(name=self.collection_name)
+                self.collection = self.client.create_collection(
+                    name=self.collection_name
+                )
+                self.lexical_index.clear()
+                self._indexed_files.clear()
             
             logger.info(f"Deleted all documents. Count before: {count_before}")
             return {
@@ -229,4 +559,34 @@ class RagService:
             
         except Exception as e:
             logger.error(f"Error deleting all documents: {e}")
-            return {"error": str(e)} 
\ No newline at end of file
+            return {"error": str(e)}
+
+
+def _chunk_files(page: dict) -> Dict[str, Optional[str]]:
+    """Map the chunk ids of a ``collection.get`` page to their Drive files."""
+    metadatas = page.get("metadatas") or [None] * len(page["ids"])
+    return {
+        chunk_id: (metadata or {}).get("g_file_id")
+        for chunk_id, metadata in zip(page["ids"], metadatas)
+    }
+
+
+_rag_service: ProcessSingleton[RagService] = ProcessSingleton(RagService)
+
+
+def get_rag_service() -> RagService:
+    """Return the process-wide RagService, creating it on first use.
+
+    The embedding model and the Chroma client are expensive to build, so a
+    single instance is kept per worker and shared by every request.
+    """
+    return _rag_service.get()
+
+
+def close_rag_service() -> None:
+    """Drop the shared RagService and release the cached Chroma clients."""
+    _rag_service.reset()
+    chromadb.api.client.SharedSystemClient.clear_system_cache()
+
+
+RagServiceDep = Annotated[RagService, Depends(get_rag_service)]
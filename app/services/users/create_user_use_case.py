@@ -7,15 +7,29 @@ from app.config.database import commit, create, get_by_attribute, update
 from app.models.user import User
 from app.schemas.error import Error
 from app.schemas.user import UserCreate
+from app.services.users.user_cache import get_user_cache
 
 logger = logging.getLogger(__name__)
 
 
 class CreateUserUseCase:
     @staticmethod
-    @commit
     def execute(
         db: Session, user_create: UserCreate
+    ) -> Tuple[Optional[User], Optional[Error]] | None:
+        user, error = CreateUserUseCase._upsert(db, user_create)
+
+        # Invalida após o commit feito por _upsert, para que uma leitura
+        # concorrente não volte a guardar os dados anteriores
+        if not error:
+            get_user_cache().invalidate(user_create.email)
+
+        return user, error
+
+    @staticmethod
+    @commit
+    def _upsert(
+        db: Session, user_create: UserCreate
     ) -> Tuple[Optional[User], Optional[Error]] | None:
         try:
             logger.info(
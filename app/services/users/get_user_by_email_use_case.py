@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.services.users.user_cache import CachedUser, get_user_cache
 
 
 class GetUserByEmailUseCase:
@@ -15,4 +16,35 @@ class GetUserByEmailUseCase:
         Returns:
             Usuário se encontrado, None caso contrário
         """
-        return db.query(User).filter(User.email == email).first() 
\ No newline at end of file
+        return db.query(User).filter(User.email == email).first()
+
+    @staticmethod
+    def execute_cached(db: Session, email: str) -> CachedUser | None:
+        """
+        Busca id e role de um usuário pelo email, passando pelo cache do
+        processo. Só consulta o banco quando a entrada não existe ou expirou.
+
+        Args:
+            db: Sessão do banco de dados
+            email: Email do usuário a ser buscado
+
+        Returns:
+            Usuário em cache se encontrado, None caso contrário
+        """
+        cache = get_user_cache()
+
+        cached = cache.get(email)
+        if cached is not None:
+            return cached
+
+        row = (
+            db.query(User.id, User.role)
+            .filter(User.email == email)
+            .first()
+        )
+        if row is None:
+            return None
+
+        cached = CachedUser(id=row.id, email=email, role=row.role)
+        cache.put(cached)
+        return cached
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from app.models.user import User, UserRole
 from app.schemas.error import Error
+from app.services.users.user_cache import get_user_cache
 
 
 class UpdateUserRoleUseCase:
@@ -32,6 +33,9 @@ class UpdateUserRoleUseCase:
             user.role = new_role
             db.commit()
             db.refresh(user)
+
+            # Só depois do commit, para que ninguém recoloque o role antigo
+            get_user_cache().invalidate(user.email)
             
             return user, None
             
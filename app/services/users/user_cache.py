@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config.settings import get_settings
+from app.models.user import UserRole
+from app.utils.singleton import ProcessSingleton
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Identidade mínima do usuário autenticado: basta para autorizar."""
+
+    id: int
+    email: str
+    role: UserRole
+
+
+class UserCache:
+    """
+    Cache LRU thread-safe de usuários por email, com tempo de vida curto.
+
+    Guarda apenas id e role, o que as rotas autenticadas precisam para
+    identificar e autorizar quem chama. É local ao processo: quem altera um
+    usuário invalida a entrada no próprio worker, e nos demais a mudança
+    aparece em até ``ttl_seconds``. Emails não encontrados não são
+    guardados, para que um usuário recém-criado seja visto na hora.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CachedUser]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, email: str) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._entries.get(email)
+
+            if entry is not None and time.monotonic() >= entry[0]:
+                del self._entries[email]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: CachedUser) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        with self._lock:
+            self._entries[user.email] = (
+                time.monotonic() + self.ttl_seconds,
+                user,
+            )
+            self._entries.move_to_end(user.email)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _build_user_cache() -> UserCache:
+    settings = get_settings()
+    return UserCache(
+        max_size=settings.USER_CACHE_MAX_SIZE,
+        ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    )
+
+
+_user_cache: ProcessSingleton[UserCache] = ProcessSingleton(_build_user_cache)
+
+
+def get_user_cache() -> UserCache:
+    """Retorna o cache de usuários compartilhado pelo processo."""
+    return _user_cache.get()
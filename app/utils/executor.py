@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.config.settings import get_settings
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class ExecutorQueueFullError(Exception):
+    """Raised when a BoundedExecutor has no free worker nor queue slot."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard limit on running plus queued jobs.
+
+    Blocking work (embedding inference, Chroma round-trips, sync SQLAlchemy
+    queries) runs here instead of on the event loop, so other streams on the
+    same worker keep flowing. Once ``max_workers + max_queue`` jobs are in
+    flight, new submissions fail fast with ``ExecutorQueueFullError`` instead
+    of piling up behind a saturated pool.
+    """
+
+    def __init__(
+        self, max_workers: int, max_queue: int, thread_name_prefix: str
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run ``func`` on the pool and await its result."""
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorQueueFullError(
+                f'Executor is full ({self.max_workers} workers, '
+                f'{self.max_queue} queued)'
+            )
+
+        try:
+            future = self._executor.submit(
+                functools.partial(func, *args, **kwargs)
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # The slot is released when the job really finishes, even if the
+        # awaiting request is cancelled in the meantime.
+        future.add_done_callback(lambda _: self._slots.release())
+
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _start_retrieval_executor() -> BoundedExecutor:
+    settings = get_settings()
+    executor = BoundedExecutor(
+        max_workers=settings.RETRIEVAL_MAX_WORKERS,
+        max_queue=settings.RETRIEVAL_MAX_QUEUE,
+        thread_name_prefix='retrieval',
+    )
+    logger.info(
+        'Retrieval executor started with '
+        f'{settings.RETRIEVAL_MAX_WORKERS} workers and queue '
+        f'depth {settings.RETRIEVAL_MAX_QUEUE}'
+    )
+    return executor
+
+
+_retrieval_executor: ProcessSingleton[BoundedExecutor] = ProcessSingleton(
+    _start_retrieval_executor
+)
+
+
+def get_retrieval_executor() -> BoundedExecutor:
+    """Return the executor used by the retrieval stage of the chat."""
+    return _retrieval_executor.get()
+
+
+def shutdown_retrieval_executor() -> None:
+    executor = _retrieval_executor.reset()
+    if executor is not None:
+        executor.shutdown()
@@ -2,7 +2,7 @@ import json
 import base64
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from app.config.settings import Settings
+from app.config.settings import get_settings
 
 def authenticate_google_drive():
     """
@@ -12,9 +12,8 @@ def authenticate_google_drive():
     Returns:
         googleapiclient.discovery.Resource: Serviço autenticado do Google Drive.
     """
-    str_b64_raw = Settings().GOOGLE_CREDENTIALS_B64
+    str_b64_raw = get_settings().GOOGLE_CREDENTIALS_B64
     str_b64=str_b64_raw.strip()
-    print(Settings().GOOGLE_CREDENTIALS_B64)
     creds_json_str = base64.b64decode(str_b64).decode('utf-8')
     if not creds_json_str:
         raise ValueError("A variável GOOGLE_CREDENTIALS_JSON não foi encontrada.")
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import httpx
+from google.auth import jwt
+
+from app.config.settings import get_settings
+from app.utils.singleton import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = {'accounts.google.com', 'https://accounts.google.com'}
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class GoogleTokenVerifier:
+    """
+    Verifica ID tokens do Google sem I/O no caminho da requisição.
+
+    Os certificados públicos do Google ficam em memória e são renovados por
+    uma tarefa em segundo plano, pouco antes de expirar o ``max-age`` do
+    Cache-Control da resposta. Tokens já verificados ficam em um LRU
+    limitado, indexado pelo hash do token, até o seu ``exp``; um token
+    repetido custa apenas uma busca no dicionário.
+    """
+
+    # Intervalo mínimo entre duas buscas de certificados
+    retry_seconds: float = 60
+    # Validade assumida quando a resposta não traz ``max-age``
+    default_max_age_seconds: float = 3600
+
+    def __init__(
+        self,
+        client_id: str,
+        certs_url: str,
+        max_cached_tokens: int,
+        refresh_margin_seconds: float = 300,
+    ):
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.max_cached_tokens = max_cached_tokens
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._certs: Dict[str, str] = {}
+        self._certs_expire_at = 0.0
+        self._last_fetch = float('-inf')
+        self._fetch_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._tokens: OrderedDict[str, Tuple[float, Dict]] = OrderedDict()
+
+    async def start(self) -> None:
+        """Carrega os certificados e inicia a renovação em segundo plano."""
+        try:
+            await self._fetch_certs()
+        except Exception as e:
+            logger.error(f'Erro ao buscar certificados do Google: {e}')
+
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def verify(self, token: str) -> Dict:
+        """
+        Retorna as claims de um ID token válido para ``client_id``.
+
+        Raises:
+            ValueError: Se o token for inválido, expirado ou de outro emissor
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+
+        cached = self._tokens.get(key)
+        if cached is not None:
+            expires_at, claims = cached
+            if now < expires_at:
+                self._tokens.move_to_end(key)
+                return claims
+            del self._tokens[key]
+
+        # Com certificados vencidos segue usando os atuais; quem renova é a
+        # tarefa em segundo plano
+        if not self._certs:
+            await self._fetch_certs()
+
+        try:
+            claims = self._decode(token)
+        except ValueError:
+            # Pode ser uma chave nova do Google: renova e tenta uma vez. O
+            # intervalo mínimo impede que tokens forjados forcem buscas.
+            if (
+                self._key_id(token) in self._certs
+                or time.monotonic() - self._last_fetch < self.retry_seconds
+            ):
+                raise
+            await self._fetch_certs(force=True)
+            claims = self._decode(token)
+
+        if claims.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f'Emissor inválido: {claims.get("iss")}')
+
+        self._remember(key, claims)
+        return claims
+
+    def _decode(self, token: str) -> Dict:
+        return jwt.decode(
+            token,
+            certs=self._certs,
+            audience=self.client_id,
+            clock_skew_in_seconds=10,
+        )
+
+    @staticmethod
+    def _key_id(token: str) -> Optional[str]:
+        try:
+            return jwt.decode_header(token).get('kid')
+        except Exception:
+            return None
+
+    def _remember(self, key: str, claims: Dict) -> None:
+        if self.max_cached_tokens <= 0:
+            return
+
+        self._tokens[key] = (float(claims['exp']), claims)
+        self._tokens.move_to_end(key)
+
+        while len(self._tokens) > self.max_cached_tokens:
+            self._tokens.popitem(last=False)
+
+    async def _fetch_certs(self, force: bool = False) -> None:
+        if self._fetch_lock is None:
+            self._fetch_lock = asyncio.Lock()
+
+        async with self._fetch_lock:
+            # Outra requisição pode ter renovado enquanto esperávamos
+            if (
+                not force
+                and self._certs
+                and time.monotonic() < self._certs_expire_at
+            ):
+                return
+
+            async with httpx.AsyncClient(timeout=10) as client:
+                response = await client.get(self.certs_url)
+                response.raise_for_status()
+
+            self._certs = response.json()
+            self._last_fetch = time.monotonic()
+            self._certs_expire_at = time.monotonic() + self._max_age(
+                response.headers.get('cache-control', '')
+            )
+            logger.info(
+                f'Certificados do Google renovados ({len(self._certs)} chaves)'
+            )
+
+    def _max_age(self, cache_control: str) -> float:
+        match = _MAX_AGE.search(cache_control)
+        if match is None:
+            return self.default_max_age_seconds
+        return float(match.group(1))
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            delay = max(
+                self.retry_seconds,
+                self._certs_expire_at
+                - time.monotonic()
+                - self.refresh_margin_seconds,
+            )
+            await asyncio.sleep(delay)
+
+            try:
+                await self._fetch_certs(force=True)
+            except Exception as e:
+                # Mantém os certificados atuais e tenta de novo mais tarde
+                logger.error(f'Erro ao renovar certificados do Google: {e}')
+
+
+def _build_google_token_verifier() -> GoogleTokenVerifier:
+    settings = get_settings()
+    return GoogleTokenVerifier(
+        client_id=settings.GOOGLE_CLIENT_ID,
+        certs_url=settings.GOOGLE_CERTS_URL,
+        max_cached_tokens=settings.AUTH_TOKEN_CACHE_MAX_SIZE,
+        refresh_margin_seconds=settings.GOOGLE_CERTS_REFRESH_MARGIN_SECONDS,
+    )
+
+
+_verifier: ProcessSingleton[GoogleTokenVerifier] = ProcessSingleton(
+    _build_google_token_verifier
+)
+
+
+def get_google_token_verifier() -> GoogleTokenVerifier:
+    """Retorna o verificador de tokens compartilhado pelo processo."""
+    return _verifier.get()
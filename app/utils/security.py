@@ -1,13 +1,14 @@
 from typing import Annotated, Dict
 
+import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from google.auth.transport import requests
-from google.oauth2 import id_token
 
-from app.config.settings import Settings
 from app.config.database import DbSession
-from app.models.user import User, UserRole
+from app.models.user import UserRole
+from app.services.users.get_user_by_email_use_case import GetUserByEmailUseCase
+from app.services.users.user_cache import CachedUser
+from app.utils.google_token_verifier import get_google_token_verifier
 
 security = HTTPBearer()
 
@@ -17,46 +18,49 @@ async def get_current_user(
 ) -> Dict[str, str]:
     try:
         token = credentials.credentials
-        idinfo = id_token.verify_oauth2_token(
-            token, requests.Request(), Settings().GOOGLE_CLIENT_ID
-        )
-
-        if idinfo['iss'] not in {
-            'accounts.google.com',
-            'https://accounts.google.com',
-        }:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token de autenticação inválido',
-            )
+        idinfo = await get_google_token_verifier().verify(token)
 
         return {
             'sub': idinfo['sub'],
             'email': idinfo.get('email'),
         }
 
-    except ValueError as e:
+    except (ValueError, httpx.HTTPError) as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Token de autenticação inválido',
         ) from e
 
 
-async def get_current_admin_user(
+async def get_current_registered_user(
     db: DbSession,
     user_data: dict = Depends(get_current_user),
-) -> User:
+) -> CachedUser:
     """
-    Verifica se o usuário atual é um administrador.
+    Resolve o usuário autenticado no banco, pelo cache de usuários do
+    processo. As rotas recebem apenas id, email e role; o id é a chave
+    usada, por exemplo, no limite de streams por usuário.
     """
-    user = db.query(User).filter(User.email == user_data['email']).first()
+    user = GetUserByEmailUseCase.execute_cached(db, email=user_data['email'])
     
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuário não encontrado",
         )
-    
+
+    return user
+
+
+async def get_current_admin_user(
+    user: CachedUser = Depends(get_current_registered_user),
+) -> CachedUser:
+    """
+    Verifica se o usuário atual é um administrador.
+
+    O role vem do cache de usuários do processo, invalidado quando o role
+    muda.
+    """
     if user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
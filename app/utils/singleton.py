@@ -0,0 +1,46 @@
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class ProcessSingleton(Generic[T]):
+    """
+    Holds one lazily built instance per worker process.
+
+    ``get`` builds the instance on first use, at most once even when several
+    threads ask for it at the same time. ``reset`` drops it and hands it back
+    so the caller can release its resources; the next ``get`` builds a fresh
+    one.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+
+        return instance
+
+    def peek(self) -> Optional[T]:
+        """Return the instance if it was already built, without building it."""
+        return self._instance
+
+    def set(self, instance: T) -> None:
+        """Replace the instance, e.g. with one rebuilt from new data."""
+        with self._lock:
+            self._instance = instance
+
+    def reset(self) -> Optional[T]:
+        """Drop the instance and return it, or None if it was never built."""
+        with self._lock:
+            instance, self._instance = self._instance, None
+
+        return instance
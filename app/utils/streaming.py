@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Generic, Optional, TypeVar
+
+import anyio
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class DisconnectAwareStream(Generic[T]):
+    """
+    Iterate an upstream async generator until the HTTP client goes away.
+
+    Each upstream chunk is raced against a watcher that polls
+    ``request.is_disconnected()``. When the client disconnects, the pending
+    chunk is cancelled and the upstream generator is closed, which lets the
+    LLM strategies close their provider stream instead of generating tokens
+    nobody will read. ``disconnected`` tells the caller how the stream ended.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        iterator: AsyncIterator[T],
+        poll_interval: float = 0.5,
+    ):
+        self.request = request
+        self.iterator = iterator
+        self.poll_interval = poll_interval
+        self.disconnected = False
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        watcher = asyncio.ensure_future(self._watch())
+        next_chunk: Optional[asyncio.Future] = None
+
+        try:
+            while True:
+                next_chunk = asyncio.ensure_future(self.iterator.__anext__())
+                done, _ = await asyncio.wait(
+                    {next_chunk, watcher},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if next_chunk in done:
+                    try:
+                        chunk = next_chunk.result()
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+                    continue
+
+                self.disconnected = True
+                logger.info('Client disconnected, cancelling LLM stream')
+                return
+        finally:
+            watcher.cancel()
+            # Closing must finish even if the response task is being
+            # cancelled, otherwise the provider connection stays open. The
+            # pending chunk is the generator itself running, so it has to
+            # end before ``aclose()`` may be called.
+            with anyio.CancelScope(shield=True):
+                if next_chunk is not None and not next_chunk.done():
+                    next_chunk.cancel()
+                    try:
+                        await next_chunk
+                    except (asyncio.CancelledError, StopAsyncIteration):
+                        pass
+
+                aclose = getattr(self.iterator, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+
+    async def _watch(self) -> None:
+        """Return once the client has disconnected."""
+        try:
+            while not await self.request.is_disconnected():
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            # Without a working watcher the stream just runs to the end
+            logger.warning(f'Disconnect watcher stopped: {e}')
+            await asyncio.Event().wait()
+
+
+class AnswerLengthTracker:
+    """
+    Moving average of the length, in tokens, of completed answers.
+
+    Used to estimate how many tokens an interrupted answer would still
+    have produced. Until the first answer completes, the estimate is the
+    ``max_tokens`` cap, which is an upper bound.
+    """
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self._average: float | None = None
+        self._lock = threading.Lock()
+
+    def observe(self, answer_tokens: int) -> None:
+        with self._lock:
+            if self._average is None:
+                self._average = float(answer_tokens)
+            else:
+                self._average += self.alpha * (answer_tokens - self._average)
+
+    def tokens_saved(self, generated_tokens: int, max_tokens: int) -> int:
+        """Estimate the tokens left ungenerated by stopping early."""
+        with self._lock:
+            expected = (
+                max_tokens if self._average is None else self._average
+            )
+        return max(0, round(min(expected, max_tokens) - generated_tokens))
+
+
+answer_lengths = AnswerLengthTracker()
@@ -0,0 +1,30 @@
+"""
+Medição de tempo por estágio do pipeline de chat
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StageTimer:
+    """
+    Acumula a duração, em milissegundos, de cada estágio de uma requisição.
+
+    As chaves são os nomes das colunas de ChatStatistics (``embedding_ms``,
+    ``ttft_ms``...), então ``durations`` pode ser gravado diretamente.
+    """
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed_ms
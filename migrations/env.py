@@ -2,14 +2,14 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
-from app.config.settings import Settings
+from app.config.settings import get_settings
 from app.config.database import Base
 from alembic import context
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option('sqlalchemy.url', Settings().DATABASE_URL)
+config.set_main_option('sqlalchemy.url', get_settings().DATABASE_URL)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -24,8 +24,10 @@ target_metadata = Base.metadata
 from app.models.user import *
 from app.models.document import *
 from app.models.chat_history import *
+from app.models.chat_message import *
 from app.models.anonymous_question import *
 from app.models.chat_statistics import *
+from app.models.topic import *
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
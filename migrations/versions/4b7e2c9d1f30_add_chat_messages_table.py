@@ -0,0 +1,116 @@
+"""add chat messages table
+
+Revision ID: 4b7e2c9d1f30
+Revises: 360362fde543
+Create Date: 2026-10-17 10:12:41.532018
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c9d1f30'
+down_revision: Union[str, None] = '360362fde543'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+chat_histories = sa.table(
+    'chat_histories',
+    sa.column('id', sa.Integer),
+    sa.column('chat_messages', sa.JSON),
+    sa.column('updated_at', sa.DateTime),
+)
+
+chat_messages = sa.table(
+    'chat_messages',
+    sa.column('chat_history_id', sa.Integer),
+    sa.column('seq', sa.Integer),
+    sa.column('role', sa.String),
+    sa.column('content', sa.Text),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('chat_history_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['chat_history_id'], ['chat_histories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_chat_messages_history_seq', 'chat_messages', ['chat_history_id', 'seq'], unique=True)
+
+    # Copia as conversas do blob JSON para uma linha por mensagem
+    connection = op.get_bind()
+    histories = connection.execution_options(yield_per=BACKFILL_BATCH_SIZE).execute(
+        sa.select(
+            chat_histories.c.id,
+            chat_histories.c.chat_messages,
+            chat_histories.c.updated_at,
+        )
+    )
+
+    rows = []
+    for history_id, blob, updated_at in histories:
+        if isinstance(blob, str):
+            blob = json.loads(blob)
+
+        for seq, message in enumerate((blob or {}).get('messages', [])):
+            rows.append({
+                'chat_history_id': history_id,
+                'seq': seq,
+                'role': message.get('role', ''),
+                'content': message.get('content') or '',
+                'created_at': updated_at,
+            })
+
+        if len(rows) >= BACKFILL_BATCH_SIZE:
+            op.bulk_insert(chat_messages, rows)
+            rows = []
+
+    if rows:
+        op.bulk_insert(chat_messages, rows)
+
+    op.drop_column('chat_histories', 'chat_messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('chat_histories', sa.Column('chat_messages', sa.JSON(), nullable=True))
+
+    # Reagrupa as mensagens no blob JSON de cada conversa
+    connection = op.get_bind()
+    messages = connection.execute(
+        sa.select(
+            chat_messages.c.chat_history_id,
+            chat_messages.c.role,
+            chat_messages.c.content,
+        ).order_by(chat_messages.c.chat_history_id, chat_messages.c.seq)
+    )
+
+    grouped = {}
+    for history_id, role, content in messages:
+        grouped.setdefault(history_id, []).append(
+            {'role': role, 'content': content}
+        )
+
+    for history_id, history_messages in grouped.items():
+        connection.execute(
+            chat_histories.update()
+            .where(chat_histories.c.id == history_id)
+            .values(chat_messages={'messages': history_messages})
+        )
+
+    op.drop_index('ix_chat_messages_history_seq', table_name='chat_messages')
+    op.drop_table('chat_messages')
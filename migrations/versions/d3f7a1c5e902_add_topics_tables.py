@@ -0,0 +1,51 @@
+"""add topics tables
+
+Revision ID: d3f7a1c5e902
+Revises: f1a9c3e7b205
+Create Date: 2026-10-17 16:05:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7a1c5e902'
+down_revision: Union[str, None] = 'f1a9c3e7b205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('topics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('keywords', sa.JSON(), nullable=False),
+    sa.Column('patterns', sa.JSON(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('topic_catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Os tópicos padrão são gravados pela aplicação na primeira carga
+    op.execute(
+        "INSERT INTO topic_catalog_version (id, version, updated_at) "
+        "VALUES (1, 0, now())"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('topic_catalog_version')
+    op.drop_table('topics')
@@ -0,0 +1,174 @@
+import asyncio
+
+import pytest
+
+from app.services.llm.admission import (
+    AdmissionController,
+    AdmissionRejectedError,
+)
+
+
+def _controller(**overrides) -> AdmissionController:
+    options = {
+        'max_concurrent': 2,
+        'max_per_user': 1,
+        'max_queue': 4,
+        'queue_timeout': 1.0,
+    }
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_admits_while_under_limits():
+    async def scenario():
+        controller = _controller()
+
+        first = await controller.acquire('ana')
+        second = await controller.acquire('bia')
+
+        assert controller.stats()['active'] == controller.max_concurrent
+        first.release()
+        second.release()
+        assert controller.stats()['active'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_release_is_idempotent():
+    async def scenario():
+        controller = _controller()
+
+        ticket = await controller.acquire('ana')
+        ticket.release()
+        ticket.release()
+
+        assert controller.stats()['active'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_per_user_cap_queues_until_release():
+    async def scenario():
+        controller = _controller()
+        ticket = await controller.acquire('ana')
+
+        waiting = asyncio.create_task(controller.acquire('ana'))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        assert controller.stats()['queued'] == 1
+
+        ticket.release()
+        second = await waiting
+
+        assert second.key == 'ana'
+        assert controller.stats()['active'] == 1
+        assert controller.stats()['queued'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_user_at_cap_does_not_block_other_users():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire('ana')
+
+        blocked = asyncio.create_task(controller.acquire('ana'))
+        await asyncio.sleep(0)
+
+        # Há vaga global: quem está na fila só espera a própria cota
+        other = await asyncio.wait_for(controller.acquire('bia'), 0.1)
+
+        assert other.key == 'bia'
+        assert not blocked.done()
+        blocked.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_global_saturation_grants_slots_in_fifo_order():
+    async def scenario():
+        controller = _controller()
+        first = await controller.acquire('ana')
+        await controller.acquire('bia')
+
+        # Sem vaga global, todos esperam na ordem de chegada
+        waiting = []
+        for user in ('carla', 'davi', 'eva'):
+            waiting.append(asyncio.create_task(controller.acquire(user)))
+            await asyncio.sleep(0)
+        assert controller.stats()['queued'] == len(waiting)
+
+        first.release()
+        ticket = await waiting[0]
+
+        assert ticket.key == 'carla'
+        for task in waiting[1:]:
+            assert not task.done()
+            task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects():
+    async def scenario():
+        controller = _controller(max_concurrent=1, queue_timeout=0.05)
+        await controller.acquire('ana')
+
+        with pytest.raises(AdmissionRejectedError) as error:
+            await controller.acquire('bia')
+
+        assert error.value.retry_after == 1
+        assert controller.stats()['queued'] == 0
+        assert controller.stats()['rejected'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects():
+    async def scenario():
+        controller = _controller(max_concurrent=1, max_queue=1)
+        await controller.acquire('ana')
+
+        waiting = asyncio.create_task(controller.acquire('bia'))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejectedError, match='queue is full'):
+            await controller.acquire('carla')
+
+        waiting.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_user_cannot_fill_the_queue():
+    async def scenario():
+        controller = _controller(max_concurrent=1)
+        await controller.acquire('ana')
+
+        waiting = asyncio.create_task(controller.acquire('bia'))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejectedError, match='for this user'):
+            await controller.acquire('bia')
+
+        waiting.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = _controller(max_concurrent=1)
+        ticket = await controller.acquire('ana')
+
+        waiting = asyncio.create_task(controller.acquire('bia'))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert controller.stats()['queued'] == 0
+        ticket.release()
+        assert controller.stats()['active'] == 0
+
+    asyncio.run(scenario())
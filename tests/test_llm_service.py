@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.config.settings import get_settings
+from app.services.llm.llm_service import LLMProviderError, OllamaStrategy
+
+REQUIRED_SETTINGS = {
+    'DATABASE_URL': 'sqlite://',
+    'GOOGLE_CLIENT_ID': 'client-id',
+    'GOOGLE_SECRET_KEY': 'secret',
+    'GOOGLE_REDIRECT_URI': 'http://localhost/callback',
+    'GOOGLE_DOMAIN': 'example.com',
+    'GOOGLE_FOLDER_NAME': 'docs',
+    'LLM_PROVIDER': 'ollama',
+    'LLM_SYSTEM_PROMPT': 'Responda em português.',
+    'ANTHROPIC_API_KEY': 'unused',
+    'ANTHROPIC_MODEL': 'unused',
+    # Porta sem servidor: a conexão é recusada na hora
+    'OLLAMA_API_URL': 'http://127.0.0.1:9',
+    'OLLAMA_MODEL': 'llama3',
+    'OLLAMA_TIMEOUT': '5',
+    'CHROMA_HOST': 'localhost',
+}
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    for name, value in REQUIRED_SETTINGS.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+async def _collect(stream) -> list:
+    return [chunk async for chunk in stream]
+
+
+def test_ollama_connection_error_is_raised_not_streamed(settings):
+    async def scenario():
+        strategy = OllamaStrategy()
+        try:
+            with pytest.raises(LLMProviderError, match='Erro ao conectar'):
+                await _collect(strategy.execute('Quando é a prova?'))
+        finally:
+            await strategy.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+from app.services.llm.semantic_cache import SemanticAnswerCache
+
+CHUNK_IDS = ['ementa.pdf_0', 'ementa.pdf_1']
+CHUNKS = ['A disciplina tem duas provas.', 'A média para aprovação é 7.']
+
+
+def _cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(threshold=0.95, max_entries=16)
+
+
+def test_hit_for_similar_question_on_same_chunks():
+    cache = _cache()
+    cache.store([1.0, 0.0], CHUNK_IDS, CHUNKS, 'Duas provas.')
+
+    assert cache.lookup([0.99, 0.05], CHUNK_IDS, CHUNKS) == 'Duas provas.'
+
+
+def test_miss_for_different_question():
+    cache = _cache()
+    cache.store([1.0, 0.0], CHUNK_IDS, CHUNKS, 'Duas provas.')
+
+    assert cache.lookup([0.0, 1.0], CHUNK_IDS, CHUNKS) is None
+
+
+def test_reuploaded_document_with_same_ids_misses():
+    cache = _cache()
+    cache.store([1.0, 0.0], CHUNK_IDS, CHUNKS, 'Duas provas.')
+
+    # Um novo upload do mesmo arquivo gera os mesmos ids de chunk
+    updated = ['A disciplina tem três provas.', CHUNKS[1]]
+
+    assert cache.lookup([1.0, 0.0], CHUNK_IDS, updated) is None
+
+
+def test_invalidate_drops_every_entry():
+    cache = _cache()
+    cache.store([1.0, 0.0], CHUNK_IDS, CHUNKS, 'Duas provas.')
+
+    cache.invalidate()
+
+    assert cache.lookup([1.0, 0.0], CHUNK_IDS, CHUNKS) is None
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,109 @@
+import asyncio
+
+from app.utils.streaming import DisconnectAwareStream
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+class Upstream:
+    """Gerador que emite um chunk e depois espera, como um LLM lento."""
+
+    def __init__(self):
+        self.closed = False
+        self.first_chunk_sent = asyncio.Event()
+
+    async def generate(self):
+        try:
+            yield 'primeiro'
+            self.first_chunk_sent.set()
+            await asyncio.Event().wait()
+            yield 'nunca'
+        finally:
+            self.closed = True
+
+
+def _other_tasks():
+    current = asyncio.current_task()
+    return [
+        task
+        for task in asyncio.all_tasks()
+        if task is not current and not task.done()
+    ]
+
+
+def test_stream_runs_to_the_end():
+    async def scenario():
+        async def generate():
+            for chunk in ('a', 'b', 'c'):
+                yield chunk
+
+        stream = DisconnectAwareStream(
+            FakeRequest(), generate(), poll_interval=0.01
+        )
+        chunks = [chunk async for chunk in stream]
+
+        assert chunks == ['a', 'b', 'c']
+        assert not stream.disconnected
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_detected_by_watcher_closes_upstream():
+    async def scenario():
+        request = FakeRequest()
+        upstream = Upstream()
+        stream = DisconnectAwareStream(
+            request, upstream.generate(), poll_interval=0.01
+        )
+
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            request.disconnected = True
+
+        assert chunks == ['primeiro']
+        assert stream.disconnected
+        assert upstream.closed
+        await asyncio.sleep(0)
+        assert not _other_tasks()
+
+    asyncio.run(scenario())
+
+
+def test_response_cancelled_mid_stream_closes_upstream():
+    async def scenario():
+        upstream = Upstream()
+        stream = DisconnectAwareStream(
+            FakeRequest(), upstream.generate(), poll_interval=10
+        )
+        chunks = []
+
+        async def consume():
+            async for chunk in stream:
+                chunks.append(chunk)
+
+        # Como o listener de desconexão do Starlette: cancela a resposta
+        # enquanto o próximo chunk ainda está pendente
+        response = asyncio.create_task(consume())
+        await upstream.first_chunk_sent.wait()
+        await asyncio.sleep(0)
+        response.cancel()
+
+        try:
+            await response
+        except asyncio.CancelledError:
+            pass
+
+        assert response.cancelled()
+        assert chunks == ['primeiro']
+        assert upstream.closed
+        await asyncio.sleep(0)
+        assert not _other_tasks()
+
+    asyncio.run(scenario())